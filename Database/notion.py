@@ -9,20 +9,16 @@ from typing import Optional, Dict, Any
 from Database.util import batch_zip
 
 import aiohttp
-from net.http_client import Session
+from net.http_client import SinkSession
 from parsers.output import Result
 
-from dotenv import load_dotenv
 from urllib.parse import urlparse
 
-load_dotenv()
-
-NOTION_API_KEY = os.getenv("NOTION_KEY")
-DATABASE_ID = os.getenv("DATABASE_ID")
-DATA_SOURCE_ID = os.getenv("DATA_SOURCE_ID")
+# credentials are read from the environment (.env) when NotionDatabase is first created,
+# not at import time, so importing this module stays cheap
 
 API_ENDPOINT = 'https://api.notion.com/v1/pages'
-QUERY_ENDPOINT = f"https://api.notion.com/v1/data_sources/{DATA_SOURCE_ID}/query"
+QUERY_ENDPOINT = "https://api.notion.com/v1/data_sources/{data_source_id}/query"
 
 TIMEOUT_2DAYS = 2 * 24 * 60 * 60  # 2 days
 
@@ -90,18 +86,22 @@ class NotionDatabase:
 
     def __init__(self):
         if not self._initialized:
+            from dotenv import load_dotenv
+            load_dotenv()
+
             self.headers = {
-               "Authorization": f"Bearer {NOTION_API_KEY}",
+               "Authorization": f"Bearer {os.getenv('NOTION_KEY')}",
                "Content-Type": "application/json",
                "Notion-Version": "2025-09-03"
             }
 
             self.api_endpoint = API_ENDPOINT
-            self.query_endpoint = QUERY_ENDPOINT
+            self.query_endpoint = QUERY_ENDPOINT.format(data_source_id=os.getenv("DATA_SOURCE_ID"))
 
             self._database_cleaner = None
+            self.leader = None  # LeaderElection, cleaner only runs on the leader when set
 
-            self.session = Session()
+            self.session = SinkSession()
 
             atexit.register(shutdown_handler)
 
@@ -133,7 +133,7 @@ class NotionDatabase:
 
         body = {
             "parent": {
-                "database_id": DATABASE_ID
+                "database_id": os.getenv("DATABASE_ID")
             },
             "properties": {
                 "Company Name": {
@@ -385,6 +385,10 @@ class NotionDatabase:
                 log.info(f"Cleaner active: {cleaner_active}")
                 await asyncio.sleep(TIMEOUT_2DAYS)
 
+                if self.leader is not None and not self.leader.is_leader:
+                    log.info("Cleaner skipped: another replica is leader")
+                    continue
+
                 cleaner_active = True
                 log.info(f"Cleaner active: {cleaner_active}")
                 await self._delete_old_entries()
@@ -1,21 +1,28 @@
 import asyncio
 import atexit
+import os
 import random
+import socket
+import time
 import yaml
 import sys
-from typing import Dict
-
-from fake_useragent import UserAgent
+from typing import Dict, Optional
 
 from Database.notion import NotionDatabase, MessageBus
 import logs.logger as log
 
-from net.browser_manager import BrowserManager
 from net.http_client import Session
 from parsers.base_parser import BaseParser
 
 from parsers.factory import ParserFactory
 from processing.tracker import Tracker
+from processing.timing import StageTimings, measure, timed, record_rows, format_report
+from interfaces.coordination import CrawlQueue, SeenStore, LeaseStore
+from coordination.leader import LeaderElection
+from coordination.memory import InMemoryLeaseStore
+from net.resource_policy import blocked_urls
+from net.airtable import export_mode
+from net.readiness import render_mode
 
 '''
 PARSER TYPES (now cleaner!)
@@ -25,9 +32,16 @@ PARSER TYPES (now cleaner!)
     - "JS"               → JavaScript-rendered content
 '''
 
+STREAMING_PARSER_TYPES = ['DOWNLOAD']  # parser types whose parser supports_stream
+
 TIMEOUT_3HOURS = 3 * 60 * 60
 TIMEOUT_24HOURS = 24 * 60 * 60
 
+LEASE_SECONDS = 15 * 60  # renewed while a site is being crawled
+QUEUE_POLL_SECONDS = 30
+
+DRAIN_TIMEOUT = 30 * 60  # run-once mode gives up on the Gateway after 30 min
+
 def verify(websites: dict):
     """
     Verify website configuration.
@@ -59,6 +73,18 @@ def verify(websites: dict):
             print(f"Warning: No selectors found for {website_name}")
             sys.exit()
 
+        if website_config.get('stream') and website_config.get('parser_type').upper() not in STREAMING_PARSER_TYPES:
+            print(f"Warning: stream is only supported by {', '.join(STREAMING_PARSER_TYPES)} parsers ({website_name})")
+            sys.exit()
+
+        try:
+            blocked_urls(website_config)
+            export_mode(website_config)
+            render_mode(website_config)
+        except ValueError as e:
+            print(f"Warning: {e} for {website_name}")
+            sys.exit()
+
 
 class Manager:
     """
@@ -68,7 +94,11 @@ class Manager:
     def __init__(
             self,
             websites_file='websites.yaml',
-            test_flag=False
+            test_flag=False,
+            crawl_queue: Optional[CrawlQueue] = None,
+            seen_store: Optional[SeenStore] = None,
+            lease_store: Optional[LeaseStore] = None,
+            workers: int = 4
     ):
         self.websites_file = websites_file
         self.running = False
@@ -78,32 +108,45 @@ class Manager:
         self.test_flag = test_flag
         self.active_count = 0
 
-        # Create parsers using factory
-        self.parsers = self._create_parsers()
-
-    def _create_parsers(self) -> Dict[str, 'BaseParser']:
-        """
-        Create all parser instances using the factory.
-        """
-        session = Session()
-        tracker = Tracker()
-        browser_manager = BrowserManager()
-        user_agent_provider = UserAgent()
-        parser_factory = ParserFactory(
-            session=session,
-            browser_manager=browser_manager,
-            user_agent_provider=user_agent_provider,
-            tracker=tracker,
-            enable_robots_refresh=True
-        )
-
-        return {
-            'DOWNLOAD': parser_factory.create_download_parser(),
-            'SEL_DOWNLOAD': parser_factory.create_selenium_download_parser(),
-            'STATIC': parser_factory.create_static_parser(),
-            'JS': parser_factory.create_js_parser()
+        # Distributed mode: sites are leased from a shared queue instead of one loop per site
+        self.crawl_queue = crawl_queue
+        self.seen_store = seen_store
+        self.workers = workers
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+
+        # Only the leader runs database maintenance (cleanup and dedupe)
+        self.leader = LeaderElection(lease_store or InMemoryLeaseStore(), 'maintenance', self.node_id)
+
+        # Parsers (and the browser / user agent / robots dependencies they need)
+        # are only created for parser types the websites file actually uses
+        self.parsers: Dict[str, 'BaseParser'] = {}
+        self._factory = None
+
+    def _create_parsers(self, parser_types) -> Dict[str, 'BaseParser']:
+        """
+        Create parser instances for the given parser types using the factory.
+        """
+        if self._factory is None:
+            self._factory = ParserFactory(
+                session=Session(),
+                tracker=Tracker(),
+                enable_robots_refresh=True,
+                seen_store=self.seen_store
+            )
+
+        builders = {
+            'DOWNLOAD': self._factory.create_download_parser,
+            'SEL_DOWNLOAD': self._factory.create_selenium_download_parser,
+            'STATIC': self._factory.create_static_parser,
+            'JS': self._factory.create_js_parser
         }
 
+        for parser_type in parser_types:
+            if parser_type in builders and parser_type not in self.parsers:
+                self.parsers[parser_type] = builders[parser_type]()
+
+        return self.parsers
+
     @classmethod
     def set_global_instance(cls, instance):
         """Set the global manager instance for cleanup."""
@@ -120,6 +163,15 @@ class Manager:
         websites = config['websites']
         verify(websites)
 
+        # Per entry state (validators, fingerprints, newest row) is keyed by name,
+        # entries scraping the same url share the fetch but not that state
+        for website_name, website_config in websites.items():
+            website_config.setdefault('name', website_name)
+
+        self._create_parsers({
+            website_config.get('parser_type').upper() for website_config in websites.values()
+        })
+
         return websites
 
     def _create_website_parsers(self):
@@ -142,11 +194,7 @@ class Manager:
                 log.warning(f"Unknown parser type: {parser_type} for {website_name}")
                 continue
 
-            # Determine timeout
-            if parser_type in ['DOWNLOAD', 'SEL_DOWNLOAD']:
-                timeout = TIMEOUT_24HOURS
-            else:
-                timeout = TIMEOUT_3HOURS
+            timeout = self._timeout_for(parser_type)
 
             # Create task
             if self.test_flag:
@@ -165,6 +213,130 @@ class Manager:
 
         return tasks
 
+    @staticmethod
+    def _timeout_for(parser_type: str) -> int:
+        """
+        Interval between crawls of a site.
+        """
+        if parser_type in ['DOWNLOAD', 'SEL_DOWNLOAD']:
+            return TIMEOUT_24HOURS
+        return TIMEOUT_3HOURS
+
+    async def _create_queue_workers(self):
+        """
+        Register every website in the shared queue and start workers.
+
+        Returns:
+            List of asyncio tasks
+        """
+        websites = self._process_websites()
+
+        for website_name, website_config in websites.items():
+            await self.crawl_queue.add(website_name, website_config)
+        await self.crawl_queue.retain(websites.keys())  # sites removed from the config
+
+        tasks = []
+        for i in range(self.workers):
+            task = asyncio.create_task(self._queue_worker(), name=f"queue-worker-{i}")
+            self.tasks[f"queue-worker-{i}"] = task
+            tasks.append(task)
+
+        return tasks
+
+    async def _queue_worker(self):
+        """
+        Lease due sites from the shared queue and crawl them.
+        """
+        while self.running:
+            # wait before leasing, a lease held through the wait could expire and go to another replica
+            while self.clearing_flag:  # if database is still being cleared wait
+                await asyncio.sleep(12 * 60)  # 12 min
+
+            job = await self.crawl_queue.lease(self.node_id, LEASE_SECONDS)
+
+            if job is None:
+                await asyncio.sleep(QUEUE_POLL_SECONDS)
+                continue
+
+            job.config.setdefault('name', job.job_id)  # per entry state, as in _process_websites
+            parser_type = job.config.get('parser_type').upper()
+            parser = self._create_parsers({parser_type}).get(parser_type)
+            offset = random.randint(-45 * 60, 45 * 60)  # ±45 min
+            interval = self._timeout_for(parser_type) + offset
+            next_run_at = time.time() + interval
+
+            if not parser:
+                log.warning(f"Unknown parser type: {parser_type} for {job.job_id}")
+                await self.crawl_queue.complete(job.job_id, self.node_id, next_run_at)
+                continue
+
+            # host's circuit is open here: hand the site back until the probe is due
+            retry_in = self._retry_in(job.config)
+            if retry_in > 0:
+                log.info(f"(Manager) Backing off {job.job_id} for {retry_in / 60:.0f} min")
+                await self.crawl_queue.complete(job.job_id, self.node_id, time.time() + retry_in)
+                continue
+
+            heartbeat = asyncio.create_task(self._renew_lease(job.job_id))
+            self.active_count += 1
+            try:
+                result = await parser.parse(job.config)
+                next_run_at = time.time() + self._next_crawl_in(job.config, interval)
+
+                if result is not None:
+                    await self.bus.publish(result)
+            except asyncio.CancelledError:
+                next_run_at = time.time()  # hand the site straight to another replica
+                raise
+            except Exception as e:
+                log.error(f"(Manager) Crawl of {job.job_id} failed: {e}")
+            finally:
+                self.active_count -= 1
+                heartbeat.cancel()
+                await self.crawl_queue.complete(job.job_id, self.node_id, next_run_at)
+
+            if self.active_count == 0:
+                await self._clear_duplicates()
+
+    async def _renew_lease(self, job_id: str):
+        """
+        Keep a lease alive while its site is being crawled.
+        """
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            if not await self.crawl_queue.renew(job_id, self.node_id, LEASE_SECONDS):
+                log.warning(f"(Manager) Lost lease for {job_id}")
+                return
+
+    async def _start_maintenance(self):
+        """
+        Join the leader election and start the database cleaner.
+
+        Every replica runs the cleaner, whether or not it has published anything,
+        the election decides which one of them deletes.
+        """
+        self.leader.start()
+        database = NotionDatabase()
+        database.leader = self.leader
+        await database
+
+    async def _clear_duplicates(self):
+        """
+        Wait for published postings to be written, then clear duplicates.
+        """
+        if not self.leader.is_leader:
+            log.info('SKIP CLEARING: another replica is leader')
+            return
+
+        while not self.bus.queue.empty():
+            await asyncio.sleep(5 * 60)  # 5 min
+
+        self.clearing_flag = True
+        log.info(f'CLEARING: duplicates')
+        await NotionDatabase().clear_duplicates()
+        log.info(f'FINISH CLEARING: duplicates')
+        self.clearing_flag = False
+
     async def _process(self, parser, config, timeout):
         """
         Main processing loop for a website.
@@ -174,9 +346,16 @@ class Manager:
             if sleep:
                 log.info(f'SLEEPING: {config["url"]}')
                 offset = random.randint(-45 * 60, 45 * 60)  # ±45 min
-                await asyncio.sleep(timeout + offset)
+                await asyncio.sleep(self._next_crawl_in(config, timeout + offset))
                 sleep = False
 
+            # host's circuit is open: wait for the probe instead of attempting
+            retry_in = self._retry_in(config)
+            if retry_in > 0:
+                log.info(f'BACKING OFF: {config["url"]} for {retry_in / 60:.0f} min')
+                await asyncio.sleep(retry_in)
+                continue
+
             while self.clearing_flag:  # if database is still being cleared wait
                 await asyncio.sleep(12 * 60)  # 12 min
 
@@ -193,17 +372,25 @@ class Manager:
                 self.active_count -= 1
 
             if self.active_count == 0:
-                while not self.bus.queue.empty():
-                    await asyncio.sleep(5 * 60)  # 5 min
-
-                self.clearing_flag = True
-                log.info(f'CLEARING: duplicates')
-                await NotionDatabase().clear_duplicates()
-                log.info(f'FINISH CLEARING: duplicates')
-                self.clearing_flag = False
+                await self._clear_duplicates()
 
             offset = random.randint(-45 * 60, 45 * 60)  # ±45 min
-            await asyncio.sleep(timeout + offset)
+            await asyncio.sleep(self._next_crawl_in(config, timeout + offset))
+
+    def _retry_in(self, config) -> float:
+        """
+        Seconds until the site's host may be tried again (circuit breaker, see net/host_scheduler.py).
+        """
+        if self._factory is None:
+            return 0.0
+        return self._factory.host_scheduler.retry_in(config['url'])
+
+    def _next_crawl_in(self, config, interval) -> float:
+        """
+        Seconds until the next crawl of a site: its interval, or when its host's open circuit allows a probe.
+        """
+        retry_in = self._retry_in(config)
+        return retry_in if retry_in > 0 else interval
 
     async def test_process(self, parser, config, timeout):
         """
@@ -230,6 +417,62 @@ class Manager:
 
             break
 
+    async def run_once(self, concurrency: int = 4) -> Dict[str, StageTimings]:
+        """
+        Crawl every configured website once, wait for the Gateway to drain and return timings.
+        """
+        websites = self._process_websites()
+        semaphore = asyncio.Semaphore(concurrency)
+        self.running = True
+
+        await self._start_maintenance()
+
+        async def crawl(website_name, website_config):
+            async with semaphore:
+                with measure() as timings:
+                    parser = self.parsers.get(website_config.get('parser_type').upper())
+                    try:
+                        if not parser:
+                            raise ValueError(f"Unknown parser type: {website_config.get('parser_type')}")
+
+                        result = await parser.parse(website_config)
+
+                        if result is not None:
+                            with timed('publish'):
+                                await self.bus.publish(result)
+                            record_rows('published', len(result.company_name))
+
+                    except Exception as e:
+                        log.error(f"(Manager) Crawl of {website_name} failed: {e}")
+                        timings.error = str(e)
+
+                print(f"done: {website_name} ({timings.total:.2f}s)")
+                return website_name, timings
+
+        try:
+            results = dict(await asyncio.gather(*[
+                crawl(website_name, website_config)
+                for website_name, website_config in websites.items()
+            ]))
+
+            drain_start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.bus.queue.join(), DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                log.error("(Manager) Gateway did not drain in time")
+
+            print(format_report(results))
+            print(f"gateway drain: {time.perf_counter() - drain_start:.2f}s")
+
+            if any(timings.rows.get('published') for timings in results.values()):
+                await self._clear_duplicates()
+
+            return results
+        finally:
+            self.running = False
+            await self.leader.stop()
+            await self._close_browsers()
+
     async def is_idle(self) -> bool:
         """
         Check if manager is idle.
@@ -244,7 +487,14 @@ class Manager:
         """
         if not self.running:
             self.running = True
-            tasks = self._create_website_parsers()
+
+            self.leader.set_global_instance(self.leader)  # for auto clean up
+            await self._start_maintenance()
+
+            if self.crawl_queue is not None:
+                tasks = await self._create_queue_workers()
+            else:
+                tasks = self._create_website_parsers()
 
             if not tasks:
                 print("No valid parser tasks created")
@@ -266,6 +516,7 @@ class Manager:
             return
 
         self.running = False
+        await self.leader.stop()
 
         # Cancel all running tasks
         for website_name, task in self.tasks.items():
@@ -274,6 +525,14 @@ class Manager:
                 task.cancel()
 
         await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        await self._close_browsers()
+
+    async def _close_browsers(self):
+        """
+        Quit the warm browser pool, if any parser started it.
+        """
+        if self._factory is not None and self._factory._browser_manager is not None:
+            await self._factory._browser_manager.close_all_browsers()
 
 _manager_instance = None
 
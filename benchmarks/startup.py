@@ -0,0 +1,199 @@
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+'''
+startup benchmark
+
+measures, in fresh interpreters:
+    - per module import cost of `import main` (python -X importtime)
+    - cold start of `main.py --once` until the first fetch reaches a local server
+
+and fails (exit 1) if any median is over the budget in budget.json.
+
+usage:
+    python -m benchmarks.startup                # check against budget
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --update       # write current numbers (+50%) as the new budget
+'''
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / 'budget.json'
+
+# modules whose import cost is reported (the ones startup pays for)
+TRACKED_MODULES = [
+    'main', 'WebsiteManager', 'Database.notion', 'pandas', 'numpy', 'aiohttp',
+    'selenium', 'bs4', 'fake_useragent', 'yaml', 'dotenv'
+]
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+CSV = "company_name,position,domain,description,date,company_size\n" \
+      "Acme,Engineer,acme.com,desc,2000-01-01,10\n"  # out of range, nothing is published
+
+WEBSITES = """
+websites:
+  benchmark-csv:
+    url: "http://localhost:{port}/jobs.csv"
+    accept: 'text/csv'
+    date_format: '%Y-%m-%d'
+    parser_type: "DOWNLOAD"
+    selectors:
+      company_name: "company_name"
+      position: "position"
+      application_link: "domain"
+      description: "description"
+      date: "date"
+"""
+
+
+def measure_imports() -> dict:
+    """
+    Cumulative import time (ms) of tracked modules for `import main`.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    costs = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and match.group(4) in TRACKED_MODULES:
+            costs[match.group(4)] = int(match.group(2)) / 1000
+
+    # modules that were never imported cost nothing
+    return {module: costs.get(module, 0.0) for module in TRACKED_MODULES}
+
+
+class _FirstFetchHandler(BaseHTTPRequestHandler):
+    first_fetch = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/jobs.csv':
+            if _FirstFetchHandler.first_fetch is None:
+                _FirstFetchHandler.first_fetch = time.perf_counter()
+
+            self.send_response(200)
+            self.send_header('Content-type', 'text/csv')
+            self.end_headers()
+            self.wfile.write(CSV.encode('utf-8'))
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+
+def measure_first_fetch() -> dict:
+    """
+    Milliseconds from spawning `main.py --once` to its first fetch, and to exit.
+    """
+    server = HTTPServer(('localhost', 0), _FirstFetchHandler)  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _FirstFetchHandler.first_fetch = None
+
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as file:
+        file.write(WEBSITES.format(port=server.server_port))
+
+    try:
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, 'main.py', '--once', '--config', file.name],
+            cwd=ROOT, capture_output=True, timeout=120, check=True
+        )
+        end = time.perf_counter()
+
+        if _FirstFetchHandler.first_fetch is None:
+            raise RuntimeError("main.py --once exited without fetching")
+
+        return {
+            'first_fetch': (_FirstFetchHandler.first_fetch - start) * 1000,
+            'run_once': (end - start) * 1000
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+        Path(file.name).unlink(missing_ok=True)
+
+
+def run(runs: int) -> dict:
+    imports = [measure_imports() for _ in range(runs)]
+    startups = [measure_first_fetch() for _ in range(runs)]
+
+    return {
+        'import_ms': {
+            module: round(statistics.median(run[module] for run in imports), 1)
+            for module in TRACKED_MODULES
+        },
+        'startup_ms': {
+            key: round(statistics.median(run[key] for run in startups), 1)
+            for key in startups[0]
+        }
+    }
+
+
+def check(results: dict, budget: dict) -> list:
+    """
+    Return a description of every measurement over budget.
+    """
+    failures = []
+    for section, values in results.items():
+        for key, value in values.items():
+            limit = budget.get(section, {}).get(key)
+            if limit is not None and value > limit:
+                failures.append(f"{section}.{key}: {value:.1f}ms > budget {limit:.1f}ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="startup time and import cost benchmark")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters per measurement (default: 5)")
+    parser.add_argument('--update', action='store_true', help="store current results (+50%%) as the budget")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    budget = json.loads(BUDGET_FILE.read_text()) if BUDGET_FILE.exists() else {}
+
+    print(f"{'measurement':<28} {'median':>10} {'budget':>10}")
+    for section, values in results.items():
+        for key, value in values.items():
+            limit = budget.get(section, {}).get(key)
+            print(f"{section + '.' + key:<28} {value:>8.1f}ms {(f'{limit:.1f}ms' if limit is not None else '-'):>10}")
+
+    if args.update:
+        new_budget = {
+            section: {key: round(max(value * 1.5, 5.0), 1) for key, value in values.items()}
+            for section, values in results.items()
+        }
+        # heavy modules that startup does not import must stay that way
+        for module, value in results['import_ms'].items():
+            if value == 0.0:
+                new_budget['import_ms'][module] = 0.0
+
+        BUDGET_FILE.write_text(json.dumps(new_budget, indent=4) + "\n")
+        print(f"budget written to {BUDGET_FILE}")
+        return
+
+    failures = check(results, budget)
+    if failures:
+        print("\nOVER BUDGET:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+    print("\nwithin budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import asyncio
+import atexit
+from typing import Optional
+
+from interfaces.coordination import LeaseStore
+import logs.logger as log
+
+
+class LeaderElection:
+    """
+    Keeps a named lease renewed in the background.
+
+    Only the replica holding the lease is leader. If it dies the lease
+    expires and the next replica to renew takes over.
+    """
+
+    def __init__(self,
+                 store: LeaseStore,
+                 name: str,
+                 owner: str,
+                 lease_seconds: float = 90):
+        self.store = store
+        self.name = name
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.renew_interval = lease_seconds / 3
+        self._is_leader = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self):
+        """Start the background election task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._election_loop())
+
+    async def stop(self):
+        """Stop campaigning and hand the lease over"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+        if self._is_leader:
+            self._is_leader = False
+            await self.store.release(self.name, self.owner)
+
+    @classmethod
+    def set_global_instance(cls, instance):
+        """Set the global election instance for cleanup."""
+        global _election_instance
+        _election_instance = instance
+
+    async def _election_loop(self):
+        """
+        Background task that takes or renews the lease.
+        """
+        try:
+            while True:
+                try:
+                    is_leader = await self.store.acquire(self.name, self.owner, self.lease_seconds)
+                except Exception as e:
+                    log.error(f"(LeaderElection) Lease check for {self.name} failed: {e}")
+                    is_leader = False
+
+                if is_leader != self._is_leader:
+                    log.info(f"(LeaderElection) {self.owner} {'is now' if is_leader else 'is no longer'} "
+                             f"leader for {self.name}")
+                self._is_leader = is_leader
+
+                await asyncio.sleep(self.renew_interval)
+
+        except asyncio.CancelledError:
+            log.info(f"(LeaderElection) election for {self.name} stopped")
+            raise
+
+_election_instance = None
+
+async def cleanup():
+    """Cleanup on shutdown"""
+    if _election_instance:
+        await _election_instance.stop()
+
+
+def shutdown_handler():
+    """Handle shutdown gracefully"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(cleanup())
+    loop.close()
+
+atexit.register(shutdown_handler)
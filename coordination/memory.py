@@ -0,0 +1,28 @@
+import time
+from typing import Dict, Tuple
+
+from interfaces.coordination import LeaseStore
+
+
+class InMemoryLeaseStore(LeaseStore):
+    """
+    Leases for a single process (every instance is its own leader).
+    """
+
+    def __init__(self):
+        self._leases: Dict[str, Tuple[str, float]] = {}  # name -> (owner, expires)
+
+    async def acquire(self, name: str, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+        holder = self._leases.get(name)
+
+        if holder is not None and holder[0] != owner and holder[1] > now:
+            return False
+
+        self._leases[name] = (owner, now + lease_seconds)
+        return True
+
+    async def release(self, name: str, owner: str) -> None:
+        holder = self._leases.get(name)
+        if holder is not None and holder[0] == owner:
+            self._leases.pop(name, None)
@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from typing import Dict, Any
+
+
+@dataclass(frozen=True)
+class CrawlJob:
+    job_id: str
+    config: Dict[str, Any]
+    owner: str
+    lease_expires: float
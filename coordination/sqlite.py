@@ -0,0 +1,209 @@
+import asyncio
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterable, Set
+
+from coordination.output import CrawlJob
+from interfaces.coordination import CrawlQueue, SeenStore, LeaseStore
+
+'''
+SQLite backed coordination for local and test use.
+
+Every call opens its own connection inside a worker thread, so the same
+file can be shared by several processes (or containers on one volume).
+'''
+
+# postings are only published on the day they are posted or the next,
+# a key first seen longer ago than that can't come back
+SEEN_RETENTION = 2 * 24 * 60 * 60  # 2 days
+
+
+@contextmanager
+def _connect(path: str):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        yield conn
+    finally:
+        conn.close()
+
+
+class SqliteCrawlQueue(CrawlQueue):
+    """
+    Crawl queue stored in a SQLite file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with _connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " config TEXT NOT NULL,"
+                " next_run_at REAL NOT NULL,"
+                " owner TEXT,"
+                " lease_expires REAL NOT NULL DEFAULT 0)"
+            )
+
+    async def add(self, job_id: str, config: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._add, job_id, config)
+
+    async def retain(self, job_ids: Iterable[str]) -> None:
+        await asyncio.to_thread(self._retain, list(job_ids))
+
+    async def lease(self, owner: str, lease_seconds: float) -> Optional[CrawlJob]:
+        return await asyncio.to_thread(self._lease, owner, lease_seconds)
+
+    async def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        return await asyncio.to_thread(self._renew, job_id, owner, lease_seconds)
+
+    async def complete(self, job_id: str, owner: str, next_run_at: float) -> None:
+        await asyncio.to_thread(self._complete, job_id, owner, next_run_at)
+
+    def _add(self, job_id: str, config: Dict[str, Any]) -> None:
+        with _connect(self.path) as conn:
+            conn.execute(
+                "INSERT INTO crawl_jobs (job_id, config, next_run_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET config = excluded.config",
+                (job_id, json.dumps(config), time.time())
+            )
+
+    def _retain(self, job_ids: list) -> None:
+        with _connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("CREATE TEMP TABLE retained (job_id TEXT PRIMARY KEY)")
+                conn.executemany("INSERT OR IGNORE INTO retained (job_id) VALUES (?)",
+                                 [(job_id,) for job_id in job_ids])
+                conn.execute("DELETE FROM crawl_jobs WHERE job_id NOT IN (SELECT job_id FROM retained)")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _lease(self, owner: str, lease_seconds: float) -> Optional[CrawlJob]:
+        now = time.time()
+        with _connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT job_id, config FROM crawl_jobs "
+                    "WHERE next_run_at <= ? AND lease_expires <= ? "
+                    "ORDER BY next_run_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                expires = now + lease_seconds
+                conn.execute(
+                    "UPDATE crawl_jobs SET owner = ?, lease_expires = ? WHERE job_id = ?",
+                    (owner, expires, row[0])
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return CrawlJob(job_id=row[0], config=json.loads(row[1]), owner=owner, lease_expires=expires)
+
+    def _renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with _connect(self.path) as conn:
+            cursor = conn.execute(
+                "UPDATE crawl_jobs SET lease_expires = ? "
+                "WHERE job_id = ? AND owner = ? AND lease_expires > ?",
+                (now + lease_seconds, job_id, owner, now)
+            )
+            return cursor.rowcount == 1
+
+    def _complete(self, job_id: str, owner: str, next_run_at: float) -> None:
+        with _connect(self.path) as conn:
+            conn.execute(
+                "UPDATE crawl_jobs SET owner = NULL, lease_expires = 0, next_run_at = ? "
+                "WHERE job_id = ? AND owner = ?",
+                (next_run_at, job_id, owner)
+            )
+
+
+class SqliteSeenStore(SeenStore):
+    """
+    Seen-posting store stored in a SQLite file.
+    """
+
+    def __init__(self, path: str, retention: float = SEEN_RETENTION):
+        self.path = path
+        self.retention = retention
+        with _connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_postings ("
+                " key TEXT PRIMARY KEY,"
+                " first_seen REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS seen_postings_first_seen ON seen_postings (first_seen)")
+
+    async def add_new(self, keys: Iterable[str]) -> Set[str]:
+        return await asyncio.to_thread(self._add_new, list(keys))
+
+    def _add_new(self, keys: list) -> Set[str]:
+        new_keys = set()
+        now = time.time()
+        with _connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # forget keys that are past the posting window
+                conn.execute("DELETE FROM seen_postings WHERE first_seen < ?", (now - self.retention,))
+                for key in keys:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO seen_postings (key, first_seen) VALUES (?, ?)",
+                        (key, now)
+                    )
+                    if cursor.rowcount == 1:
+                        new_keys.add(key)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return new_keys
+
+
+class SqliteLeaseStore(LeaseStore):
+    """
+    Named leases stored in a SQLite file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with _connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                " name TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires REAL NOT NULL)"
+            )
+
+    async def acquire(self, name: str, owner: str, lease_seconds: float) -> bool:
+        return await asyncio.to_thread(self._acquire, name, owner, lease_seconds)
+
+    async def release(self, name: str, owner: str) -> None:
+        await asyncio.to_thread(self._release, name, owner)
+
+    def _acquire(self, name: str, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with _connect(self.path) as conn:
+            cursor = conn.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires <= ?",
+                (name, owner, now + lease_seconds, now)
+            )
+            return cursor.rowcount == 1
+
+    def _release(self, name: str, owner: str) -> None:
+        with _connect(self.path) as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
@@ -1,5 +1,6 @@
 from abc import abstractmethod, ABC
-from typing import Optional, Any
+from dataclasses import dataclass
+from typing import Optional, Any, AsyncIterator
 from urllib.parse import urlparse
 
 
@@ -11,3 +12,45 @@ class ContentFetcher(ABC):
     @abstractmethod
     async def fetch(self, url: str, **kwargs) -> Optional[Any]:
         pass
+
+
+class ContentStream(ABC):
+    """
+    Abstraction for content that arrives incrementally (e.g. a large download).
+    """
+
+    encoding: Optional[str] = None  # declared charset, if any
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        """Yield the body as it arrives"""
+        pass
+
+    @abstractmethod
+    async def aclose(self) -> None:
+        """Release the underlying connection"""
+        pass
+
+
+@dataclass(frozen=True)
+class RawContent:
+    """
+    Undecoded response body with its declared charset (None if the server sent none).
+    """
+    body: bytes
+    encoding: Optional[str] = None
+
+    def __bool__(self):
+        return bool(self.body)
+
+
+class NotModified:
+    """
+    Returned by fetchers when the server reports unchanged content (HTTP 304).
+    """
+
+    def __repr__(self):
+        return "NOT_MODIFIED"
+
+
+NOT_MODIFIED = NotModified()
@@ -0,0 +1,70 @@
+from abc import abstractmethod, ABC
+from typing import Optional, Dict, Any, Iterable, Set
+
+from coordination.output import CrawlJob
+
+
+class CrawlQueue(ABC):
+    """
+    Abstraction for a shared queue of site crawl jobs.
+
+    Jobs are leased to one worker at a time, so replicas sharing
+    the same backend never crawl a site twice. Production backends
+    (any network store with atomic updates) implement this interface;
+    SqliteCrawlQueue is the local/testing stand-in.
+    """
+
+    @abstractmethod
+    async def add(self, job_id: str, config: Dict[str, Any]) -> None:
+        """Register a job (keeps the existing schedule if already queued)"""
+        pass
+
+    @abstractmethod
+    async def retain(self, job_ids: Iterable[str]) -> None:
+        """Drop every job not in job_ids (sites removed from the config)"""
+        pass
+
+    @abstractmethod
+    async def lease(self, owner: str, lease_seconds: float) -> Optional[CrawlJob]:
+        """Lease the next due job, or None if nothing is due"""
+        pass
+
+    @abstractmethod
+    async def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extend a held lease, False if it was lost"""
+        pass
+
+    @abstractmethod
+    async def complete(self, job_id: str, owner: str, next_run_at: float) -> None:
+        """Release the lease and schedule the next run"""
+        pass
+
+
+class SeenStore(ABC):
+    """
+    Abstraction for a shared store of already published postings.
+
+    Keys only need to be kept as long as a posting can pass the date
+    filter, backends may forget older ones.
+    """
+
+    @abstractmethod
+    async def add_new(self, keys: Iterable[str]) -> Set[str]:
+        """Record keys and return the ones that were not seen before"""
+        pass
+
+
+class LeaseStore(ABC):
+    """
+    Abstraction for named, expiring leases (used for leader election).
+    """
+
+    @abstractmethod
+    async def acquire(self, name: str, owner: str, lease_seconds: float) -> bool:
+        """Take or renew the lease, False if another owner holds it"""
+        pass
+
+    @abstractmethod
+    async def release(self, name: str, owner: str) -> None:
+        """Give up the lease if held by owner"""
+        pass
@@ -7,6 +7,10 @@ class DataProcessor(ABC):
     Abstraction for data processing steps.
     """
 
+    # True if the step can run on each chunk of a streamed download independently.
+    # Steps that need the whole frame (and everything after them) run once on the joined chunks.
+    streamable = True
+
     @abstractmethod
     async def process(self, df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFrame:
         """Process dataframe and return modified version"""
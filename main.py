@@ -1,11 +1,46 @@
 from WebsiteManager import Manager
+import argparse
 import asyncio
+import os
+
+from dotenv import load_dotenv
+
+from coordination.sqlite import SqliteCrawlQueue, SqliteSeenStore, SqliteLeaseStore
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Automated job board")
+    parser.add_argument('--config', default='websites.yaml', help="websites file (default: websites.yaml)")
+    parser.add_argument('--once', action='store_true',
+                        help="crawl every site once, print a timing report and exit")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="sites crawled at the same time with --once (default: 4)")
+    return parser.parse_args()
 
 async def main():
-    manager = Manager()
+    args = parse_args()
+    load_dotenv()
+
+    # set CRAWL_QUEUE_DB to share sites between replicas (see .env.example)
+    queue_db = os.getenv("CRAWL_QUEUE_DB")
+
+    if queue_db and not args.once:
+        manager = Manager(
+            args.config,
+            crawl_queue=SqliteCrawlQueue(queue_db),
+            seen_store=SqliteSeenStore(queue_db),
+            lease_store=SqliteLeaseStore(queue_db),
+            workers=int(os.getenv("CRAWL_WORKERS", "4"))
+        )
+    else:
+        manager = Manager(args.config)
+
     manager.set_global_instance(manager) # for clean up
-    await manager.start()
+
+    if args.once:
+        await manager.run_once(args.concurrency)
+    else:
+        await manager.start()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
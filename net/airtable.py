@@ -0,0 +1,146 @@
+import json
+import os
+import re
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+from logs import logger as log
+
+'''
+direct airtable exports
+
+the first time a shared view is downloaded through the UI, chrome's
+performance log shows the request that produced the csv. it is cached per
+view (AIRTABLE_ENDPOINTS_FILE) and later runs replay it over http without a
+browser. when the replay fails (expired access policy, changed endpoint)
+the cached request is dropped and the UI flow runs again. the cache is only
+an optimisation, a file that can't be written is logged and the UI keeps
+being used.
+
+per site in websites.yaml:
+
+    export: direct    # default, replay the captured request when there is one
+    export: ui        # always download through the browser
+
+captured headers can carry session / csrf tokens, the file is only
+readable by its owner.
+
+env:
+    AIRTABLE_ENDPOINTS_FILE=logs/cache/airtable_endpoints.json
+'''
+
+# under the mounted logs volume, the rest of /app is not writable in the container
+ENDPOINTS_FILE = os.path.join('logs', 'cache', 'airtable_endpoints.json')
+
+EXPORT_MODES = ('direct', 'ui')
+
+CSV_URL = re.compile(r'/downloadCsv\b|\.csv(\?|$)', re.IGNORECASE)
+
+# never replayed: set by the http client, or tied to the browser session
+SKIPPED_HEADERS = {'host', 'cookie', 'content-length', 'connection', 'accept-encoding'}
+
+
+def export_mode(config: Dict[str, Any]) -> str:
+    """
+    How a site's csv is exported: 'direct' or 'ui'.
+    """
+    mode = config.get('export', 'direct')
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"Unknown export mode: {mode} (expected one of {', '.join(EXPORT_MODES)})")
+    return mode
+
+
+@dataclass(frozen=True)
+class CapturedRequest:
+    url: str
+    method: str
+    headers: Dict[str, str]
+
+
+def find_csv_request(performance_log: List[dict]) -> Optional[CapturedRequest]:
+    """
+    The request that returned the csv export, from chrome's performance log entries.
+    """
+    requests = {}
+    csv_request_ids = []
+
+    for entry in performance_log:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        params = message.get('params', {})
+        if message.get('method') == 'Network.requestWillBeSent':
+            requests[params.get('requestId')] = params.get('request', {})
+
+        elif message.get('method') == 'Network.responseReceived':
+            response = params.get('response', {})
+            disposition = str(response.get('headers', {}).get('content-disposition', ''))
+            if 'csv' in response.get('mimeType', '') or '.csv' in disposition:
+                csv_request_ids.append(params.get('requestId'))
+
+    candidates = [requests[request_id] for request_id in csv_request_ids if request_id in requests]
+    candidates += [request for request in requests.values() if CSV_URL.search(request.get('url', ''))]
+
+    for request in candidates:
+        if request.get('method', 'GET') != 'GET':
+            continue
+
+        headers = {
+            name: value for name, value in request.get('headers', {}).items()
+            if not name.startswith(':') and name.lower() not in SKIPPED_HEADERS
+        }
+        return CapturedRequest(request['url'], 'GET', headers)
+
+    return None
+
+
+class AirtableEndpointCache:
+    """
+    Captured export requests per shared view, persisted to a json file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        # read when built, not on import: main.py loads .env after its imports
+        path = path or os.getenv('AIRTABLE_ENDPOINTS_FILE') or ENDPOINTS_FILE
+        self.path = path
+        self._endpoints: Dict[str, CapturedRequest] = {}
+
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                self._endpoints = {view: CapturedRequest(**request) for view, request in json.load(file).items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError) as e:
+            log.warning(f"(AirtableEndpointCache) Ignoring unreadable {path}: {e}")
+
+    def get(self, view_url: str) -> Optional[CapturedRequest]:
+        return self._endpoints.get(view_url)
+
+    def put(self, view_url: str, request: CapturedRequest) -> None:
+        """
+        Remember a view's export request.
+
+        Raises:
+            OSError: the file could not be written (the request is still kept in memory)
+        """
+        self._endpoints[view_url] = request
+        self._save()
+
+    def remove(self, view_url: str) -> None:
+        if self._endpoints.pop(view_url, None) is not None:
+            self._save()
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        # write then rename, a crash never leaves half a file. owner only, headers may hold tokens
+        temporary = f"{self.path}.tmp"
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.chmod(temporary, 0o600)  # in case a stale temporary file had other permissions
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump({view: asdict(request) for view, request in self._endpoints.items()}, file, indent=4)
+        os.replace(temporary, self.path)
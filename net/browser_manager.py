@@ -1,106 +1,400 @@
 import asyncio
-import tempfile
-from typing import Dict, Optional
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.remote.client_config import ClientConfig
+from selenium.webdriver.remote.command import Command
 import logs.logger as log
+from net.reaper import BrowserReaper, descendants, process_table
+from net.scratch import ScratchSpace, directory_size
+
+'''
+warm browser pool
+
+fetchers lease a running Chrome instead of launching one per page. a leased
+browser is returned with release(); it goes back to the pool unless it is
+unhealthy or due for recycling (after BROWSER_MAX_PAGES pages or once the
+chrome process tree uses more than BROWSER_MAX_RSS_MB). at most
+BROWSER_POOL_SIZE browsers are leased at a time.
+
+profiles live in the scratch space (net/scratch.py) and are deleted with
+their browser; the reaper (net/reaper.py) cleans up after crashes.
+
+webdriver calls are blocking http round trips to chromedriver, so they run
+on the pool's own threads (run()) and never on the event loop.
+
+with SELENIUM_REMOTE_URL the browsers are sessions on a Selenium Grid (or a
+standalone-chrome container) instead of local processes; leasing, recycling
+and resetting work the same. downloads stay on the grid node and are copied
+over with managed downloads (net/downloads.py), the memory limit only
+applies to local browsers. keep BROWSER_POOL_SIZE at or below the grid's
+capacity (nodes x sessions per node), extra session requests queue on the
+grid.
+
+env:
+    BROWSER_POOL_SIZE=2
+    BROWSER_MAX_PAGES=50
+    BROWSER_MAX_RSS_MB=1024
+    SELENIUM_REMOTE_URL=http://selenium-hub:4444
+'''
+
+POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', 2))
+MAX_PAGES = int(os.getenv('BROWSER_MAX_PAGES', 50))
+MAX_RSS_MB = int(os.getenv('BROWSER_MAX_RSS_MB', 1024))
+REMOTE_URL = os.getenv('SELENIUM_REMOTE_URL') or None
+
+PAGE_TIMEOUT = 300  # seconds, page loads and scripts
+REMOTE_TIMEOUT = PAGE_TIMEOUT + 30  # seconds, http calls to the grid outlive the page timeout
+
+
+class RemoteChrome(webdriver.Remote):
+    """
+    Chrome on a grid node, with the CDP and log commands of a local ChromeDriver.
+    """
+
+    def __init__(self, remote_url: str, options: Options):
+        config = ClientConfig(remote_server_addr=remote_url, keep_alive=True, timeout=REMOTE_TIMEOUT)
+        connection = ChromiumRemoteConnection(remote_url, vendor_prefix='goog', browser_name='chrome',
+                                              client_config=config)
+        super().__init__(command_executor=connection, options=options)
+
+    def get_log(self, log_type: str) -> List[dict]:
+        return self.execute(Command.GET_LOG, {'type': log_type})['value']
+
+
+@dataclass
+class PooledBrowser:
+    driver: webdriver.Remote
+    user_data_dir: Optional[str]  # local browsers only
+    capture_network: bool = False  # launched with the performance (network) log
+    pages: int = 0
+    created: float = field(default_factory=time.monotonic)
 
 
 class BrowserManager:
     """
-    Simple browser manager - just tracks browsers for cleanup.
+    Pool of warm browsers leased to fetchers, also tracks them for cleanup.
     """
 
     _instance = None
     _initialized = False
 
-    def __new__(cls):
+    def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, pool_size: int = POOL_SIZE, max_pages: int = MAX_PAGES, max_rss_mb: int = MAX_RSS_MB,
+                 scratch: Optional[ScratchSpace] = None, remote_url: Optional[str] = REMOTE_URL):
         if not self._initialized:
-            self._browsers: Dict[str, webdriver.Chrome] = {}  # browser_id -> driver
+            self.pool_size = pool_size
+            self.max_pages = max_pages
+            self.max_rss_mb = max_rss_mb
+            self.remote_url = remote_url
+            self.scratch = scratch if scratch is not None else ScratchSpace()
+            self.reaper = BrowserReaper(self)
+
+            self._browsers: Dict[str, PooledBrowser] = {}  # browser_id -> browser (leased or idle)
+            self._idle: List[PooledBrowser] = []
+            self._leased: Set[str] = set()
             self._lock = asyncio.Lock()
-            self._creation_semaphore = asyncio.Semaphore(2) # max 2 browser at a time
+            self._slots = asyncio.Semaphore(pool_size)  # leased browsers at a time
+            # one thread per leased browser plus one for launches / quits of idle browsers
+            self._executor = ThreadPoolExecutor(max_workers=pool_size + 1, thread_name_prefix='browser')
             BrowserManager._initialized = True
-            log.info("(BrowserManager) Initialized")
+            log.info(f"(BrowserManager) Initialized (pool size {pool_size}"
+                     f"{f', grid {remote_url}' if remote_url else ''})")
+            if remote_url:
+                log.info(f"(BrowserManager) BROWSER_MAX_RSS_MB ({max_rss_mb}) does not apply to grid sessions, "
+                         f"browsers are only recycled after {max_pages} pages or when they stop responding")
+
+    @property
+    def remote(self) -> bool:
+        """Browsers run on a Selenium Grid, not in this container"""
+        return self.remote_url is not None
 
-    async def create_browser(
-            self,
-            download_dir: Optional[str] = None,
-            headless: bool = True
-    ) -> webdriver.Chrome:
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
         """
-        Create a browser and return the driver.
+        Run a blocking webdriver call on the browser threads.
 
-        Returns:
-            driver - use it however you want
+        Example:
+            await browser_manager.run(driver.get, url)
         """
-        async with self._creation_semaphore:
-            try:
-                chrome_options = Options()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def lease(self, download_dir: Optional[str] = None, blocked_urls: Optional[List[str]] = None,
+                    user_agent: Optional[str] = None, capture_network: bool = False) -> webdriver.Remote:
+        """
+        Lease a browser from the pool (launching one if none is idle). Give it back with release().
 
-                if headless:
-                    chrome_options.add_argument("--headless")
+        Args:
+            download_dir: where downloads are saved
+            blocked_urls: url patterns not to load (see net/resource_policy.py)
+            user_agent: sent instead of chrome's own (the agent robots.txt was checked for)
+            capture_network: record network events for driver.get_log('performance'). only browsers
+                launched for it do, chromedriver buffers every event of those until the log is read
+        """
+        await self._slots.acquire()
+        try:
+            browser = await self._take_idle(capture_network)
+            if browser is None:
+                await self._make_room()
+                browser = await self._launch(capture_network=capture_network)
 
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--disable-gpu")
-                chrome_options.add_argument("--disable-extensions")
-                chrome_options.add_argument("--disable-plugins")
-                chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+            if download_dir and not self.remote:  # remote downloads stay on the node's managed download dir
+                await self.run(browser.driver.execute_cdp_cmd, "Browser.setDownloadBehavior", {
+                    "behavior": "allow",
+                    "downloadPath": download_dir
+                })
 
-                # User data directory
-                user_data_dir = tempfile.mkdtemp(prefix='browser_')
-                chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
-                chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                chrome_options.add_experimental_option('useAutomationExtension', False)
-
-                # Configure downloads if needed
-                if download_dir:
-                    prefs = {
-                        "download.default_directory": download_dir,
-                        "download.prompt_for_download": False,
-                        "download.directory_upgrade": True,
-                        "profile.default_content_settings.popups": 0
-                    }
-                    chrome_options.add_experimental_option("prefs", prefs)
-
-                driver = webdriver.Chrome(options=chrome_options)
-                driver.set_page_load_timeout(300)
-                driver.set_script_timeout(300)
-
-                # Track it
-                async with self._lock:
-                    browser_id = str(id(driver))
-                    self._browsers[browser_id] = driver
-
-                log.info(f"(BrowserManager) Created browser {browser_id}")
-                return driver
-
-            except Exception as e:
-                log.error(f"(BrowserManager) Failed to create browser: {e}")
-                raise
-
-    async def close_browser(self, driver: webdriver.Chrome):
+            if blocked_urls:
+                await self.run(self._block, browser.driver, blocked_urls)
+
+            if user_agent:
+                await self.run(browser.driver.execute_cdp_cmd, "Network.setUserAgentOverride", {"userAgent": user_agent})
+
+            self._leased.add(str(id(browser.driver)))
+            return browser.driver
+
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def release(self, driver: webdriver.Remote) -> None:
         """
-        Close a specific browser.
+        Return a leased browser, it is recycled if it is unhealthy or worn out.
         """
+        browser_id = str(id(driver))
+        browser = self._browsers.get(browser_id)
+        if browser is None or browser_id not in self._leased:
+            log.warning("(BrowserManager) Released a browser that is not leased")
+            return
+
+        self._leased.discard(browser_id)
+
         try:
-            browser_id = str(id(driver))
+            browser.pages += 1
+            reason = await self.run(self._recycle_reason, browser)
+
+            if reason is None:
+                try:
+                    await self.run(self._reset, browser.driver, browser.capture_network)
+                except Exception as e:
+                    reason = f"reset failed ({e})"
 
-            driver.quit()
+            if reason is not None:
+                log.info(f"(BrowserManager) Recycling browser {id(driver)}: {reason}")
+                await self._quit(browser)
+                return
 
             async with self._lock:
-                self._browsers.pop(browser_id, None)
+                self._idle.append(browser)
+        finally:
+            self._slots.release()
 
-            log.info(f"(BrowserManager) Closed browser {browser_id}")
+    async def _take_idle(self, capture_network: bool = False) -> Optional[PooledBrowser]:
+        """Most recently used idle browser of the requested kind that still responds"""
+        while True:
+            async with self._lock:
+                matching = [index for index, idle in enumerate(self._idle) if idle.capture_network == capture_network]
+                if not matching:
+                    return None
+                browser = self._idle.pop(matching[-1])
+
+            if await self.run(self._healthy, browser.driver):
+                return browser
+
+            log.warning(f"(BrowserManager) Browser {id(browser.driver)} crashed, discarding")
+            await self._quit(browser)
+
+    async def _make_room(self) -> None:
+        """Quit the oldest idle browser (of the other kind) before a launch would exceed pool_size browsers"""
+        async with self._lock:
+            if len(self._browsers) < self.pool_size or not self._idle:
+                return
+            browser = self._idle.pop(0)
+
+        await self._quit(browser)
+
+    async def trim_scratch(self) -> int:
+        """
+        Quit idle browsers, largest profile first, while the scratch space is over quota. Returns the bytes freed.
+        Profiles grow while their browser runs, the quota check in ScratchSpace.create() only sees new ones.
+        """
+        freed = 0
+        while await self.run(self.scratch.usage) > self.scratch.quota_bytes:
+            async with self._lock:
+                idle = [browser for browser in self._idle if browser.user_data_dir]
+            if not idle:
+                log.warning("(BrowserManager) Scratch space over quota, no idle browser to recycle")
+                break
+
+            sizes = await self.run(lambda: [directory_size(browser.user_data_dir) for browser in idle])
+            size, largest = max(zip(sizes, idle), key=lambda pair: pair[0])
+
+            async with self._lock:
+                if largest not in self._idle:  # leased in the meantime
+                    continue
+                self._idle.remove(largest)
+
+            log.info(f"(BrowserManager) Recycling browser {id(largest.driver)}: scratch space over quota "
+                     f"({size / 2 ** 20:.0f} MB profile)")
+            await self._quit(largest)
+            freed += size
+
+        return freed
+
+    def driver_pids(self) -> Set[int]:
+        """Chromedriver pids of every tracked browser"""
+        pids = set()
+        for browser in list(self._browsers.values()):
+            try:
+                pids.add(browser.driver.service.process.pid)
+            except Exception:
+                continue
+        return pids
+
+    async def _launch(self, headless: bool = True, capture_network: bool = False) -> PooledBrowser:
+        if not self.remote:  # nothing runs here to reap on a grid
+            self.reaper.start()
+        user_data_dir = None
+        try:
+            chrome_options = Options()
+            chrome_options.page_load_strategy = 'eager'  # DOMContentLoaded, readiness waits do the rest
+
+            if headless:
+                chrome_options.add_argument("--headless")
+
+            chrome_options.add_argument("--no-sandbox")
+            chrome_options.add_argument("--disable-dev-shm-usage")
+            chrome_options.add_argument("--disable-gpu")
+            chrome_options.add_argument("--disable-extensions")
+            chrome_options.add_argument("--disable-plugins")
+            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+
+            if self.remote:
+                chrome_options.enable_downloads = True  # files are fetched from the node (get_downloadable_files)
+            else:
+                # User data directory
+                user_data_dir = await self.run(self.scratch.create, 'browser_')
+                chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            chrome_options.add_experimental_option('useAutomationExtension', False)
+            chrome_options.add_experimental_option("prefs", {
+                "download.prompt_for_download": False,
+                "download.directory_upgrade": True,
+                "profile.default_content_settings.popups": 0
+            })
+            if capture_network:
+                # network events, used to discover direct export endpoints (net/airtable.py)
+                chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+            driver = await self.run(self._start_chrome, chrome_options)
+
+            # Track it
+            browser = PooledBrowser(driver, user_data_dir, capture_network=capture_network)
+            async with self._lock:
+                self._browsers[str(id(driver))] = browser
+
+            log.info(f"(BrowserManager) Created browser {id(driver)}")
+            return browser
 
+        except Exception as e:
+            log.error(f"(BrowserManager) Failed to create browser: {e}")
+            if user_data_dir:
+                await self.run(self.scratch.remove, user_data_dir)
+            raise
+
+    def _start_chrome(self, chrome_options: Options) -> webdriver.Remote:
+        if self.remote:
+            driver = RemoteChrome(self.remote_url, chrome_options)
+        else:
+            driver = webdriver.Chrome(options=chrome_options)
+        driver.set_page_load_timeout(PAGE_TIMEOUT)
+        driver.set_script_timeout(PAGE_TIMEOUT)
+        return driver
+
+    def _recycle_reason(self, browser: PooledBrowser) -> Optional[str]:
+        if browser.pages >= self.max_pages:
+            return f"served {browser.pages} pages"
+
+        if not self._healthy(browser.driver):
+            return "not responding"
+
+        rss_mb = self._rss_mb(browser.driver)
+        if rss_mb > self.max_rss_mb:
+            return f"using {rss_mb:.0f} MB"
+
+        return None
+
+    @staticmethod
+    def _healthy(driver: webdriver.Remote) -> bool:
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _block(driver: webdriver.Remote, blocked_urls: List[str]) -> None:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+
+    def _reset(self, driver: webdriver.Remote, drain_log: bool = False) -> None:
+        """Leave a single blank tab without cookies (or downloads) for the next lease"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+
+        driver.switch_to.window(handles[0])
+        driver.get("about:blank")
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        if self.remote:
+            driver.delete_downloadable_files()
+        else:
+            driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "default"})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+        driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": ""})  # empty = chrome's own again
+        if drain_log:
+            driver.get_log('performance')  # drain, the next lease starts with an empty network log
+
+    @staticmethod
+    def _rss_mb(driver: webdriver.Remote) -> float:
+        """
+        Resident memory of chromedriver and every chrome process under it (0 where /proc is unavailable).
+        """
+        try:
+            root = driver.service.process.pid
+        except Exception:
+            return 0.0
+
+        table = process_table()
+        total_kb = sum(table[pid].rss_kb for pid in descendants(table, root) if pid in table)
+        return total_kb / 1024
+
+    async def _quit(self, browser: PooledBrowser) -> None:
+        browser_id = str(id(browser.driver))
+        try:
+            await self.run(browser.driver.quit)
         except Exception as e:
             log.error(f"(BrowserManager) Error closing browser: {e}")
 
+        if browser.user_data_dir:
+            await self.run(self.scratch.remove, browser.user_data_dir)
+
+        async with self._lock:
+            self._browsers.pop(browser_id, None)
+
+        log.info(f"(BrowserManager) Closed browser {browser_id}")
+
     async def close_all_browsers(self):
         """
         Close ALL browsers.
@@ -108,13 +402,12 @@ class BrowserManager:
         log.info(f"(BrowserManager) Closing {len(self._browsers)} browser(s)...")
 
         async with self._lock:
-            drivers = list(self._browsers.values())
-            self._browsers.clear()
+            browsers = list(self._browsers.values())
+            self._idle.clear()
+            self._leased.clear()
 
-        for driver in drivers:
-            try:
-                driver.quit()
-            except Exception as e:
-                log.error(f"(BrowserManager) Error closing browser: {e}")
+        for browser in browsers:
+            await self._quit(browser)
 
+        self.reaper.stop()
         log.info("(BrowserManager) All browsers closed")
@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+from typing import Optional, Dict, Mapping
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ValidatorCache:
+    """
+    Remembers ETag / Last-Modified per site entry (or URL) so fetchers can send conditional GETs.
+    """
+
+    def __init__(self):
+        self._validators: Dict[str, Validators] = {}
+
+    def get(self, key: str) -> Optional[Validators]:
+        return self._validators.get(key)
+
+    def headers(self, key: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for the stored validators"""
+        validators = self._validators.get(key)
+        if validators is None:
+            return {}
+
+        headers = {}
+        if validators.etag:
+            headers["If-None-Match"] = validators.etag
+        if validators.last_modified:
+            headers["If-Modified-Since"] = validators.last_modified
+        return headers
+
+    def update(self, key: str, response_headers: Mapping[str, str]) -> None:
+        """Store validators from a 200 response (forget them if the server sent none)"""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+
+        if etag or last_modified:
+            self._validators[key] = Validators(etag, last_modified)
+        else:
+            self._validators.pop(key, None)
+
+    def remove(self, key: str) -> None:
+        self._validators.pop(key, None)
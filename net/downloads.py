@@ -0,0 +1,182 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+from typing import Any, Awaitable, Callable, Optional
+
+from logs import logger as log
+
+'''
+download completion
+
+chrome writes a download to "<name>.crdownload" and renames it when it is
+done. wait_for_download() returns the finished file as soon as no
+.crdownload is left and its size has not changed for stable_for seconds.
+the directory is watched with inotify (linux) so it reacts right away;
+elsewhere it falls back to polling.
+
+browsers on a Selenium Grid download to the node, wait_for_remote_download()
+polls the node's managed downloads instead and copies the finished file
+into a local directory.
+'''
+
+DOWNLOAD_TIMEOUT = 5 * 60  # seconds
+STABLE_FOR = 0.5           # seconds the size must stay the same
+POLL_INTERVAL = 0.25       # seconds, only without inotify
+REMOTE_POLL_INTERVAL = 1.0  # seconds, each poll is a round trip to the grid
+IN_PROGRESS_SUFFIXES = ('.crdownload', '.tmp')
+
+# inotify(7)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+def _libc():
+    if not hasattr(_libc, 'cached'):
+        name = ctypes.util.find_library('c')
+        libc = ctypes.CDLL(name, use_errno=True) if name else None
+        _libc.cached = libc if libc is not None and hasattr(libc, 'inotify_init1') else None
+    return _libc.cached
+
+
+class DirectoryWatcher:
+    """
+    Wakes up on file changes in a directory (inotify), or every poll_interval without it.
+    """
+
+    def __init__(self, directory: str, use_inotify: bool = True, poll_interval: float = POLL_INTERVAL):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._fd = None
+        self._changed = asyncio.Event()
+
+        libc = _libc() if use_inotify else None
+        if libc is None:
+            return
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return
+
+        self._fd = fd
+        asyncio.get_running_loop().add_reader(fd, self._on_event)
+
+    @property
+    def event_driven(self) -> bool:
+        return self._fd is not None
+
+    def _on_event(self) -> None:
+        try:
+            while os.read(self._fd, 4096):  # drain, the events themselves are not needed
+                pass
+        except BlockingIOError:
+            pass
+        self._changed.set()
+
+    async def changed(self, timeout: float) -> None:
+        """Return on the next change in the directory, or after timeout"""
+        if not self.event_driven:
+            timeout = min(timeout, self.poll_interval)
+
+        try:
+            await asyncio.wait_for(self._changed.wait(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            pass
+        self._changed.clear()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> 'DirectoryWatcher':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _finished_file(directory: str, suffix: str) -> Optional[str]:
+    """A downloaded file ending in suffix, None while any download is still in progress"""
+    names = sorted(os.listdir(directory))
+    if any(name.endswith(IN_PROGRESS_SUFFIXES) for name in names):
+        return None
+
+    for name in names:
+        if name.endswith(suffix):
+            return os.path.join(directory, name)
+    return None
+
+
+async def wait_for_download(directory: str, suffix: str = '.csv', timeout: float = DOWNLOAD_TIMEOUT,
+                            stable_for: float = STABLE_FOR, use_inotify: bool = True) -> Optional[str]:
+    """
+    Path of the finished download in directory, None if nothing finished within timeout.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    seen = None  # (path, size, since)
+
+    with DirectoryWatcher(directory, use_inotify) as watcher:
+        while True:
+            now = loop.time()
+            if now >= deadline:
+                log.error(f"(Downloads) Nothing finished in {directory} after {timeout}s: {os.listdir(directory)}")
+                return None
+
+            path = _finished_file(directory, suffix)
+            try:
+                size = os.path.getsize(path) if path is not None else None
+            except FileNotFoundError:  # renamed / removed since the listing
+                path = None
+
+            if path is None:
+                seen = None
+                wait = deadline - now
+            else:
+                if seen is None or seen[:2] != (path, size):
+                    seen = (path, size, now)
+
+                if now - seen[2] >= stable_for:
+                    return path
+                wait = seen[2] + stable_for - now
+
+            await watcher.changed(min(wait, deadline - now))
+
+
+async def wait_for_remote_download(driver, directory: str, run: Callable[..., Awaitable[Any]], suffix: str = '.csv',
+                                   timeout: float = DOWNLOAD_TIMEOUT,
+                                   poll_interval: float = REMOTE_POLL_INTERVAL) -> Optional[str]:
+    """
+    Copy the finished download of a grid browser into directory, None if nothing finished within timeout.
+
+    Args:
+        run: runs the blocking webdriver calls (BrowserManager.run)
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    while loop.time() < deadline:
+        names = sorted(await run(driver.get_downloadable_files))
+
+        if not any(name.endswith(IN_PROGRESS_SUFFIXES) for name in names):
+            for name in names:
+                if name.endswith(suffix):
+                    await run(driver.download_file, name, directory)
+                    return os.path.join(directory, name)
+
+        await asyncio.sleep(poll_interval)
+
+    log.error(f"(Downloads) Nothing finished on the grid node after {timeout}s")
+    return None
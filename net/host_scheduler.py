@@ -0,0 +1,196 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from logs import logger as log
+
+'''
+per-host request scheduling shared by every fetcher
+
+    - politeness: requests to one host are spaced by its crawl-delay
+    - throttling: a 429/503 pauses the host for its Retry-After and adds a
+      penalty to the spacing that doubles on every throttle and halves on
+      every success
+    - circuit breaker: after repeated failures a host is skipped for a
+      backoff period that doubles each time it trips again, then a single
+      probe request decides whether it closes or re-opens
+
+circuit states:
+    CLOSED    → requests go through, failures are counted
+    OPEN      → requests are refused until the backoff has passed
+    HALF_OPEN → one probe request is let through
+'''
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+FAILURE_THRESHOLD = 2        # consecutive failures that open the circuit
+BASE_BACKOFF = 30 * 60       # first open period (30 min)
+MAX_BACKOFF = 24 * 60 * 60   # longest open period (24 hours)
+PROBE_TIMEOUT = 10 * 60      # a probe that never reports back is given up after 10 min
+
+DEFAULT_RETRY_AFTER = 30     # pause when a throttle response has no Retry-After
+MAX_PENALTY = 2 * 60         # largest extra spacing added by throttling
+MAX_WAIT = 2 * 60            # pauses longer than this skip the host instead of waiting
+
+
+@dataclass
+class HostState:
+    last_request: float = float('-inf')  # time.monotonic() of the last request
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    circuit: str = CLOSED
+    failures: int = 0       # consecutive failures
+    trips: int = 0          # consecutive times the circuit opened (sets the backoff)
+    open_until: float = 0.0
+    probe_started: Optional[float] = None
+
+    penalty: float = 0.0        # extra spacing while the host is throttling us
+    paused_until: float = 0.0   # Retry-After
+
+
+class HostScheduler:
+    """
+    Per-host politeness, throttling and circuit breaking. Different hosts never wait on each other.
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, base_backoff: float = BASE_BACKOFF,
+                 max_backoff: float = MAX_BACKOFF, probe_timeout: float = PROBE_TIMEOUT,
+                 max_penalty: float = MAX_PENALTY, max_wait: float = MAX_WAIT):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.probe_timeout = probe_timeout
+        self.max_penalty = max_penalty
+        self.max_wait = max_wait
+        self._hosts: Dict[str, HostState] = {}
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def state(self, url: str) -> HostState:
+        host = self.host(url)
+        if host not in self._hosts:
+            self._hosts[host] = HostState()
+        return self._hosts[host]
+
+    async def wait(self, url: str, min_interval: float) -> None:
+        """
+        Wait until a request to url's host is allowed, then claim the slot.
+        """
+        state = self.state(url)
+
+        async with state.lock:
+            now = time.monotonic()
+            delay = max(state.last_request + min_interval + state.penalty, state.paused_until) - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            state.last_request = time.monotonic()
+
+    def allow(self, url: str) -> bool:
+        """
+        False while the host's circuit is open (or a probe is already in flight),
+        or while it asked us to stay away for longer than max_wait.
+        """
+        state = self.state(url)
+        now = time.monotonic()
+
+        if state.paused_until - now > self.max_wait:
+            return False
+
+        if state.circuit == CLOSED:
+            return True
+
+        if state.circuit == OPEN:
+            if now < state.open_until:
+                return False
+
+            state.circuit = HALF_OPEN
+            log.info(f"(HostScheduler) Probing {self.host(url)}")
+
+        # HALF_OPEN: a single probe at a time
+        if state.probe_started is not None and now - state.probe_started < self.probe_timeout:
+            return False
+
+        state.probe_started = now
+        return True
+
+    def retry_in(self, url: str) -> float:
+        """
+        Seconds until allow() lets a request to url's host through again, 0 if it would now.
+        Schedulers sleep this long instead of their usual interval while a circuit is open.
+        """
+        state = self.state(url)
+        now = time.monotonic()
+
+        wait = state.open_until - now if state.circuit == OPEN else 0.0
+        if state.paused_until - now > self.max_wait:
+            wait = max(wait, state.paused_until - now)
+        return max(wait, 0.0)
+
+    def record_success(self, url: str) -> None:
+        state = self.state(url)
+
+        if state.circuit != CLOSED:
+            log.info(f"(HostScheduler) Circuit closed for {self.host(url)}")
+
+        state.circuit = CLOSED
+        state.failures = 0
+        state.trips = 0
+        state.probe_started = None
+        state.penalty = state.penalty / 2 if state.penalty >= 1 else 0.0
+
+    def record_failure(self, url: str) -> None:
+        state = self.state(url)
+        state.failures += 1
+        state.probe_started = None
+
+        if state.circuit == HALF_OPEN or state.failures >= self.failure_threshold:
+            self._trip(url, state)
+
+    def record_throttled(self, url: str, retry_after: Optional[float] = None) -> float:
+        """
+        Slow the host down after a 429/503. Returns seconds until the next request may go out.
+        """
+        state = self.state(url)
+        state.penalty = min(max(state.penalty * 2, 1.0), self.max_penalty)
+
+        pause = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+        state.paused_until = max(state.paused_until, time.monotonic() + pause)
+
+        log.warning(f"(HostScheduler) {self.host(url)} is throttling, pausing {pause:.0f}s "
+                    f"(+{state.penalty:.0f}s between requests)")
+        return state.paused_until - time.monotonic() + state.penalty
+
+    def _trip(self, url: str, state: HostState) -> None:
+        backoff = min(self.base_backoff * 2 ** state.trips, self.max_backoff)
+
+        state.circuit = OPEN
+        state.trips += 1
+        state.failures = 0
+        state.open_until = time.monotonic() + backoff
+
+        log.warning(f"(HostScheduler) Circuit open for {self.host(url)}, skipping it for {backoff / 60:.0f} min")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), None if missing/invalid.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
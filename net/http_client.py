@@ -1,26 +1,123 @@
 import aiohttp
 import asyncio
 import atexit
+import os
+from dataclasses import dataclass, fields, replace
+from typing import Optional
 
-class Session(aiohttp.ClientSession):
+'''
+connection pools
+
+scraping and the notion sink use separate ClientSessions, each with its own
+connector, so a slow job board can't hold connections notion writes need.
+every setting can be overridden from the environment, e.g. SCRAPE_LIMIT_PER_HOST=2
+or SINK_READ_TIMEOUT=20 (see .env.example).
+'''
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    limit: int                      # open connections in total
+    limit_per_host: int             # open connections per host
+    keepalive_timeout: float        # seconds an idle connection is kept
+    ttl_dns_cache: int              # seconds a DNS answer is reused
+    connect_timeout: float          # seconds to establish a connection
+    read_timeout: float             # seconds between reads
+    total_timeout: Optional[float]  # seconds for a whole request, None for no limit
+
+    def from_env(self, prefix: str) -> 'PoolSettings':
+        """Copy of these settings with PREFIX_<FIELD> environment overrides applied"""
+        overrides = {}
+        for field in fields(self):
+            env_value = os.getenv(f"{prefix}_{field.name.upper()}")
+            if not env_value:
+                continue
+
+            value = int(env_value) if field.type is int else float(env_value)
+            if field.name == 'total_timeout' and value <= 0:
+                value = None
+            overrides[field.name] = value
+        return replace(self, **overrides)
+
+
+SCRAPE_POOL = PoolSettings(
+    limit=32,
+    limit_per_host=4,
+    keepalive_timeout=30,
+    ttl_dns_cache=10 * 60,
+    connect_timeout=10,
+    read_timeout=60,
+    total_timeout=5 * 60
+)
+
+SINK_POOL = PoolSettings(
+    limit=8,
+    limit_per_host=8,
+    keepalive_timeout=60,
+    ttl_dns_cache=60 * 60,
+    connect_timeout=10,
+    read_timeout=30,
+    total_timeout=60
+)
+
+
+class _PooledSession(aiohttp.ClientSession):
+    """
+    Singleton ClientSession with its own tuned connector.
+    """
     _instance = None
+    env_prefix: str = None
+    pool: PoolSettings = None
 
     def __new__(cls):
-        if not cls._instance and not hasattr(cls, '_initialized'):
-                # or (hasattr(cls._instance, 'closed') and cls._instance.closed)): # just incase if it ever closes
+        if not cls.__dict__.get('_instance') and '_initialized' not in cls.__dict__:
             cls._instance = super().__new__(cls)
             cls._initialized = False
         return cls._instance
 
     def __init__(self):
         if not self._initialized:
-            super().__init__()
-            self._initialized = True
+            settings = self.pool.from_env(self.env_prefix)
+
+            connector = aiohttp.TCPConnector(
+                limit=settings.limit,
+                limit_per_host=settings.limit_per_host,
+                keepalive_timeout=settings.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=settings.ttl_dns_cache
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=settings.total_timeout,
+                sock_connect=settings.connect_timeout,
+                sock_read=settings.read_timeout
+            )
+
+            super().__init__(connector=connector, timeout=timeout)
+            self.settings = settings
+            type(self)._initialized = True
+
+
+class Session(_PooledSession):
+    """
+    Pool for scraping (job boards, csv downloads).
+    """
+    env_prefix = 'SCRAPE'
+    pool = SCRAPE_POOL
+
+
+class SinkSession(_PooledSession):
+    """
+    Pool for the notion API.
+    """
+    env_prefix = 'SINK'
+    pool = SINK_POOL
+
 
 async def cleanup():
-    session = Session()
-    if not session.closed:
-        await session.close()
+    for cls in (Session, SinkSession):
+        session = cls.__dict__.get('_instance')
+        if session is not None and not session.closed:
+            await session.close()
 
 def shutdown_handler():
     loop = asyncio.new_event_loop()
@@ -28,4 +125,4 @@ def shutdown_handler():
     loop.run_until_complete(cleanup())
     loop.close()
 
-atexit.register(shutdown_handler)
\ No newline at end of file
+atexit.register(shutdown_handler)
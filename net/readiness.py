@@ -0,0 +1,112 @@
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+from logs import logger as log
+
+'''
+readiness waits for JS-rendered pages
+
+instead of sleeping a fixed time after driver.get, the page is polled until
+every configured condition holds (or the timeout passes):
+
+    wait:
+      selector: "div.job-row"   # defaults to the first selector of the site
+      min_count: 10             # at least this many matches (default 1)
+      network_idle: 500         # ms since the last resource finished loading
+      dom_stable: 500           # ms without DOM mutations (default 500)
+      timeout: 30               # seconds (default 30)
+
+network idle is read from the Resource Timing API, which only lists finished
+requests: it means "nothing finished in the last N ms", good enough for xhr
+driven job lists.
+
+once ready, a page is extracted
+
+    render: live        # default, from the live page while the browser stays leased
+    render: snapshot    # from a copy of the rendered html, the browser is released first
+'''
+
+POLL_INTERVAL = 0.1
+
+RENDER_MODES = ('live', 'snapshot')
+
+# returns true once all conditions hold, installs a MutationObserver on the first call
+READY_SCRIPT = """
+const [selector, minCount, idleMs, stableMs] = arguments;
+const now = performance.now();
+
+if (stableMs && !window.__readinessObserver) {
+    window.__lastMutation = now;
+    window.__readinessObserver = new MutationObserver(() => { window.__lastMutation = performance.now(); });
+    window.__readinessObserver.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    return false;
+}
+
+if (document.readyState === 'loading') return false;
+if (selector && document.querySelectorAll(selector).length < minCount) return false;
+
+if (idleMs) {
+    const lastResponse = performance.getEntriesByType('resource')
+        .reduce((latest, entry) => Math.max(latest, entry.responseEnd), 0);
+    if (now - lastResponse < idleMs) return false;
+}
+
+if (stableMs && now - window.__lastMutation < stableMs) return false;
+return true;
+"""
+
+
+@dataclass(frozen=True)
+class Readiness:
+    selector: Optional[str] = None
+    min_count: int = 1
+    network_idle: int = 0    # ms
+    dom_stable: int = 500    # ms
+    timeout: float = 30      # seconds
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'Readiness':
+        """
+        Readiness for a site from its `wait` block, waiting on its first selector by default.
+        """
+        wait = config.get('wait') or {}
+        selectors = [value for value in (config.get('selectors') or {}).values() if isinstance(value, str)]
+
+        return cls(
+            selector=wait.get('selector', selectors[0] if selectors else None),
+            min_count=int(wait.get('min_count', 1)),
+            network_idle=int(wait.get('network_idle', 0)),
+            dom_stable=int(wait.get('dom_stable', 500)),
+            timeout=float(wait.get('timeout', 30))
+        )
+
+
+def render_mode(config: Dict[str, Any]) -> str:
+    """
+    How a ready page is extracted: 'live' or 'snapshot'.
+    """
+    mode = config.get('render', 'live')
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {mode} (expected one of {', '.join(RENDER_MODES)})")
+    return mode
+
+
+def wait_until_ready(driver, readiness: Readiness) -> bool:
+    """
+    Poll the page until it is ready, False on timeout. Blocking, run it on the browser threads.
+    """
+    deadline = time.monotonic() + readiness.timeout
+    args = (readiness.selector, readiness.min_count, readiness.network_idle, readiness.dom_stable)
+
+    while time.monotonic() < deadline:
+        try:
+            if driver.execute_script(READY_SCRIPT, *args):
+                return True
+        except Exception:
+            pass  # navigation in progress replaces the document, try again
+
+        time.sleep(POLL_INTERVAL)
+
+    log.warning(f"(Readiness) Page not ready after {readiness.timeout}s ({readiness}), extracting what is there")
+    return False
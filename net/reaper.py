@@ -0,0 +1,231 @@
+import asyncio
+import os
+import signal
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from logs import logger as log
+
+'''
+orphaned browser reaping
+
+a chromedriver whose WebDriver was lost (crash mid-launch, a quit that
+failed) keeps its chrome alive, and every chrome keeps its profile on disk.
+every REAPER_INTERVAL seconds the reaper kills
+
+    browsers      whose --user-data-dir is in this process' scratch root but
+                  no longer owned by the browser pool, or in the root of a
+                  process that is no longer running (with their chromedriver)
+    chromedriver  started by this process that the pool does not track
+
+together with their child processes, then purges the scratch roots of dead
+processes (net/scratch.py) and, while this process is over its scratch
+quota, has the pool quit idle browsers with the largest profiles. browsers of other live workers on the same host
+are never touched. processes younger than GRACE seconds are left alone,
+they may be a browser that is still launching. only linux (/proc) is
+supported, elsewhere it does nothing.
+
+env:
+    REAPER_INTERVAL=300
+'''
+
+REAPER_INTERVAL = int(os.getenv('REAPER_INTERVAL', 300))
+GRACE = 120  # seconds
+
+PROC = '/proc'
+
+
+@dataclass(frozen=True)
+class Process:
+    pid: int
+    ppid: int
+    name: str
+    cmdline: List[str]
+    rss_kb: int
+    age: float  # seconds
+
+
+@dataclass(frozen=True)
+class ReapReport:
+    processes: int = 0
+    memory_bytes: int = 0
+    disk_bytes: int = 0
+
+
+def process_table() -> Dict[int, Process]:
+    """Every process readable in /proc (empty without /proc)"""
+    if not os.path.isdir(PROC):
+        return {}
+
+    try:
+        with open(f'{PROC}/uptime', 'r') as file:
+            uptime = float(file.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        uptime = 0.0
+    ticks = os.sysconf('SC_CLK_TCK')
+
+    table = {}
+    for entry in os.listdir(PROC):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'{PROC}/{entry}/stat', 'r') as file:
+                # pid (comm) state ppid ... starttime is field 22 - comm may contain spaces
+                head, tail = file.read().rsplit(')', 1)
+            fields = tail.split()
+            with open(f'{PROC}/{entry}/cmdline', 'rb') as file:
+                cmdline = [arg.decode('utf-8', 'replace') for arg in file.read().split(b'\0') if arg]
+
+            rss_kb = 0
+            with open(f'{PROC}/{entry}/status', 'r') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        rss_kb = int(line.split()[1])
+                        break
+        except (OSError, ValueError, IndexError):  # exited while reading
+            continue
+
+        pid = int(entry)
+        table[pid] = Process(pid, int(fields[1]), head.split('(', 1)[1], cmdline, rss_kb,
+                             max(uptime - int(fields[19]) / ticks, 0.0))
+    return table
+
+
+def descendants(table: Dict[int, Process], root: int) -> List[int]:
+    """root and every process below it"""
+    children: Dict[int, List[int]] = {}
+    for process in table.values():
+        children.setdefault(process.ppid, []).append(process.pid)
+
+    found = []
+    pending = [root]
+    while pending:
+        pid = pending.pop()
+        found.append(pid)
+        pending.extend(children.get(pid, []))
+    return found
+
+
+def _user_data_dir(process: Process) -> Optional[str]:
+    for arg in process.cmdline:
+        if arg.startswith('--user-data-dir='):
+            return os.path.normpath(arg.split('=', 1)[1])
+    return None
+
+
+def find_orphans(table: Dict[int, Process], own_root: str, owned_dirs: Set[str], dead_roots: List[str],
+                 driver_pids: Set[int], own_pid: int, grace: float = GRACE) -> List[int]:
+    """
+    Pids of the top-level orphaned chrome / chromedriver processes.
+    """
+    own_root = os.path.normpath(own_root) + os.sep
+    dead = [os.path.normpath(root) + os.sep for root in dead_roots]
+    owned = {os.path.normpath(path) for path in owned_dirs}
+    orphans = set()
+
+    for process in table.values():
+        if process.age < grace or process.pid == own_pid:
+            continue
+
+        if process.name.startswith('chromedriver'):
+            if process.pid not in driver_pids and process.ppid == own_pid:
+                orphans.add(process.pid)
+            continue
+
+        user_data_dir = _user_data_dir(process)
+        if not user_data_dir:
+            continue
+
+        if user_data_dir.startswith(own_root):
+            if user_data_dir in owned:
+                continue
+        elif not any(user_data_dir.startswith(root) for root in dead):
+            continue  # someone else's browser, or a live worker's
+
+        # only the browser process, its renderers / helpers go with it
+        parent = table.get(process.ppid)
+        if parent is not None and _user_data_dir(parent) == user_data_dir:
+            continue
+
+        # a dead worker's chromedriver goes with its browser
+        if parent is not None and parent.name.startswith('chromedriver') and parent.pid not in driver_pids \
+                and (parent.ppid == own_pid or not user_data_dir.startswith(own_root)):
+            orphans.add(parent.pid)
+        else:
+            orphans.add(process.pid)
+
+    # a chrome under an orphaned chromedriver is killed with it
+    covered = {pid for orphan in orphans for pid in descendants(table, orphan)[1:]}
+    return [pid for pid in orphans if pid not in covered]
+
+
+class BrowserReaper:
+    """
+    Periodically kills orphaned browsers and purges stale scratch space.
+    """
+
+    def __init__(self, browser_manager, interval: int = REAPER_INTERVAL, grace: float = GRACE):
+        self.browser_manager = browser_manager
+        self.interval = interval
+        self.grace = grace
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background reaping task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._reap_loop())
+
+    def stop(self):
+        """Stop the background reaping task"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    async def _reap_loop(self):
+        """
+        Background task that reaps right away (leftovers of a previous run) and then every interval.
+        """
+        try:
+            while True:
+                try:
+                    await asyncio.to_thread(self.reap)
+                    await self.browser_manager.trim_scratch()
+                except Exception as e:
+                    log.error(f"(BrowserReaper) Reaping failed: {e}")
+                await asyncio.sleep(self.interval)
+
+        except asyncio.CancelledError:
+            log.info("(BrowserReaper) Stopped")
+            raise
+
+    def reap(self) -> ReapReport:
+        """
+        Kill orphaned browsers and purge stale scratch directories. Blocking.
+        """
+        scratch = self.browser_manager.scratch
+        table = process_table()
+        orphans = find_orphans(table, scratch.root, scratch.owned, scratch.dead_roots(),
+                               self.browser_manager.driver_pids(), os.getpid(), self.grace)
+
+        killed = 0
+        memory_kb = 0
+        for orphan in orphans:
+            for pid in descendants(table, orphan):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    continue
+                killed += 1
+                memory_kb += table[pid].rss_kb if pid in table else 0
+
+            if table[orphan].ppid == os.getpid():
+                try:
+                    os.waitpid(orphan, 0)  # our child, don't leave a zombie
+                except ChildProcessError:
+                    pass
+
+        report = ReapReport(killed, memory_kb * 1024, scratch.purge_stale())
+
+        if report.processes or report.disk_bytes:
+            log.info(f"(BrowserReaper) Killed {report.processes} orphaned browser process(es), reclaimed "
+                     f"{report.memory_bytes / 2 ** 20:.1f} MB of memory and {report.disk_bytes / 2 ** 20:.1f} MB of disk")
+        return report
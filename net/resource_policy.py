@@ -0,0 +1,62 @@
+from typing import Dict, Any, List
+
+'''
+resource blocking for chrome
+
+job listings are read as text, so images, media, fonts and third-party
+trackers only cost load time, bandwidth and memory. the patterns are handed
+to CDP Network.setBlockedURLs when a browser is leased (and cleared when it
+is released).
+
+per site in websites.yaml:
+
+    resources: default        # default | light | none
+    # or
+    resources:
+      profile: light
+      block:                  # extra url patterns (* wildcards)
+        - "*://cdn.example.com/widgets/*"
+
+profiles:
+    none    → load everything
+    default → images, media, fonts, ad / analytics hosts (layout and text unchanged)
+    light   → default + stylesheets (faster, but css-hidden elements become visible text)
+'''
+
+IMAGES = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp']
+MEDIA = ['*.mp4', '*.webm', '*.ogg', '*.mp3', '*.wav', '*.m4a', '*.mov']
+FONTS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+STYLESHEETS = ['*.css']
+
+TRACKERS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*googlesyndication.com*', '*doubleclick.net*',
+    '*googleadservices.com*', '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*segment.io*',
+    '*segment.com/analytics*', '*mixpanel.com*', '*amplitude.com*', '*fullstory.com*', '*intercom.io*',
+    '*intercomcdn.com*', '*clarity.ms*', '*newrelic.com*', '*nr-data.net*', '*sentry.io*', '*linkedin.com/px*',
+    '*ads.linkedin.com*', '*bat.bing.com*', '*adservice.google.com*', '*quantserve.com*', '*scorecardresearch.com*'
+]
+
+PROFILES: Dict[str, List[str]] = {
+    'none': [],
+    'default': IMAGES + MEDIA + FONTS + TRACKERS,
+    'light': IMAGES + MEDIA + FONTS + TRACKERS + STYLESHEETS,
+}
+
+DEFAULT_PROFILE = 'default'
+
+
+def blocked_urls(config: Dict[str, Any]) -> List[str]:
+    """
+    Url patterns to block for a site.
+    """
+    resources = config.get('resources', DEFAULT_PROFILE)
+    extra = []
+
+    if isinstance(resources, dict):
+        extra = list(resources.get('block', []))
+        resources = resources.get('profile', DEFAULT_PROFILE)
+
+    if resources not in PROFILES:
+        raise ValueError(f"Unknown resource profile: {resources} (expected one of {', '.join(PROFILES)})")
+
+    return PROFILES[resources] + extra
@@ -0,0 +1,151 @@
+import errno
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Optional, Set
+
+from logs import logger as log
+
+'''
+scratch space for browsers
+
+chrome profiles and download directories are created under a root of
+their own per process, SCRATCH_DIR/<pid>-<start time>, so they can be
+measured, capped and cleaned up. a directory is removed as soon as its
+browser / download is done with it.
+
+several workers can share a host (and SCRATCH_DIR): a process only ever
+touches its own root, and the roots of processes that are no longer
+running (crash, previous container run), which the reaper purges
+(net/reaper.py). the start time in the name keeps a reused pid from
+passing for the dead owner. pids are only meaningful within one pid
+namespace, so don't put SCRATCH_DIR on a volume shared by containers.
+
+the quota is per process. it is checked when a directory is created, and
+by the reaper, which recycles idle browsers with the largest profiles while
+it is exceeded (running profiles keep growing).
+
+env:
+    SCRATCH_DIR=<tmp>/job-scraper
+    SCRATCH_QUOTA_MB=2048
+'''
+
+SCRATCH_DIR = os.getenv('SCRATCH_DIR') or os.path.join(tempfile.gettempdir(), 'job-scraper')
+SCRATCH_QUOTA_MB = int(os.getenv('SCRATCH_QUOTA_MB', 2048))
+
+
+def process_start(pid: int) -> Optional[int]:
+    """Start time of a running process (clock ticks since boot), None if it is not running or without /proc"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as file:
+            # pid (comm) state ppid ... starttime is field 22 - comm may contain spaces
+            return int(file.read().rsplit(')', 1)[1].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def owner_alive(root_name: str) -> bool:
+    """
+    Whether the process that created a scratch root (named <pid>-<start time>) is still running.
+    Names that are not scratch roots count as alive, they are never touched.
+    """
+    try:
+        pid, start = (int(part) for part in root_name.split('-'))
+    except ValueError:
+        return True
+
+    if os.path.isdir('/proc'):
+        return process_start(pid) == start
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def directory_size(path: str) -> int:
+    """Bytes used by everything under path"""
+    size = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:  # removed while walking
+                continue
+    return size
+
+
+class ScratchSpace:
+    """
+    Temporary directories owned by this process, under a root of its own, with a size quota.
+    """
+
+    def __init__(self, base: str = SCRATCH_DIR, quota_mb: int = SCRATCH_QUOTA_MB):
+        self.base = base
+        self.quota_bytes = quota_mb * 1024 * 1024
+
+        pid = os.getpid()
+        start = process_start(pid)
+        self.root = os.path.join(base, f"{pid}-{start if start is not None else int(time.time())}")
+        self._owned: Set[str] = set()
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def owned(self) -> Set[str]:
+        return set(self._owned)
+
+    def usage(self) -> int:
+        """Bytes used under this process' root"""
+        return directory_size(self.root)
+
+    def create(self, prefix: str) -> str:
+        """
+        New directory owned by this process.
+
+        Raises:
+            OSError (EDQUOT): the quota is used up
+        """
+        used = self.usage()
+        if used >= self.quota_bytes:
+            raise OSError(errno.EDQUOT, f"Scratch space over quota ({used / 2 ** 20:.0f} MB used "
+                                        f"of {self.quota_bytes / 2 ** 20:.0f} MB)", self.root)
+
+        os.makedirs(self.root, exist_ok=True)
+        path = tempfile.mkdtemp(prefix=prefix, dir=self.root)
+        self._owned.add(path)
+        return path
+
+    def remove(self, path: str) -> int:
+        """
+        Delete a directory, returns the bytes freed.
+        """
+        self._owned.discard(path)
+        size = directory_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        return size - (directory_size(path) if os.path.exists(path) else 0)
+
+    def dead_roots(self) -> List[str]:
+        """Roots under the base whose process is no longer running"""
+        try:
+            names = os.listdir(self.base)
+        except FileNotFoundError:
+            return []
+
+        return [os.path.join(self.base, name) for name in names
+                if os.path.join(self.base, name) != self.root and os.path.isdir(os.path.join(self.base, name))
+                and not owner_alive(name)]
+
+    def purge_stale(self) -> int:
+        """
+        Delete the roots of processes that are no longer running, returns the bytes freed.
+        """
+        stale = self.dead_roots()
+        freed = sum(self.remove(path) for path in stale)
+
+        if stale:
+            log.info(f"(ScratchSpace) Purged {len(stale)} stale root(s), {freed / 2 ** 20:.1f} MB freed")
+        return freed
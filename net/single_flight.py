@@ -0,0 +1,48 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+'''
+single-flight fetch sharing
+
+several websites.yaml entries often scrape the same url (e.g. categories of
+one board). calls with the same key share one in-flight request, and a
+successful result is kept for a short ttl so entries that start a little
+later reuse it as well. every entry still runs its own extraction.
+'''
+
+SHARED_FETCH_TTL = 5 * 60  # seconds a fetched result is reused
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one and caches non-None results for ttl seconds.
+    """
+
+    def __init__(self, ttl: float = SHARED_FETCH_TTL):
+        self.ttl = ttl
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self._results.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        # one caller being cancelled must not cancel the request the others wait on
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+
+        now = time.monotonic()
+        self._results = {k: v for k, v in self._results.items() if now - v[0] < self.ttl}
+        self._results[key] = (now, task.result())
@@ -0,0 +1,127 @@
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+'''
+user agent pool
+
+agents come from user_agents.json (committed next to this file), nothing is
+downloaded or generated at runtime. each host keeps the agent it was first
+given, so robots.txt is evaluated for the agent we actually send and a board
+sees one consistent client.
+
+rotation policies:
+    rotate_after=None  → sticky for the life of the process (default)
+    rotate_after=N     → a host gets a new agent once its agent is N seconds old
+
+env (read when the pool is built, see rotate_after_from_env):
+    USER_AGENT_ROTATE_AFTER=       (seconds, empty keeps agents sticky)
+
+refresh the file (needs fake-useragent, only here):
+    python -m net.user_agents
+'''
+
+USER_AGENTS_FILE = Path(__file__).resolve().parent / 'user_agents.json'
+POOL_SIZE = 25
+
+
+class UserAgentPool:
+    """
+    Precomputed user agents with per-host sticky assignment.
+    """
+
+    def __init__(self, agents: List[str], rotate_after: Optional[float] = None):
+        if not agents:
+            raise ValueError("UserAgentPool needs at least one user agent")
+
+        self.agents = agents
+        self.rotate_after = rotate_after
+        self._assigned: Dict[str, Tuple[str, float]] = {}  # host : (agent, assigned at)
+
+    @classmethod
+    def load(cls, path: Path = USER_AGENTS_FILE, rotate_after: Optional[float] = None) -> 'UserAgentPool':
+        with open(path, 'r', encoding='utf-8') as file:
+            return cls(json.load(file), rotate_after)
+
+    @property
+    def random(self) -> str:
+        """Any agent from the pool (same interface as fake_useragent.UserAgent)"""
+        return random.choice(self.agents)
+
+    def for_host(self, url: str) -> str:
+        """The agent assigned to url's host"""
+        host = urlparse(url).netloc.lower()
+        assigned = self._assigned.get(host)
+
+        if assigned is not None:
+            agent, assigned_at = assigned
+            if self.rotate_after is None or time.monotonic() - assigned_at < self.rotate_after:
+                return agent
+
+        return self.rotate(url)
+
+    def rotate(self, url: str) -> str:
+        """Give url's host a different agent"""
+        host = urlparse(url).netloc.lower()
+        previous = self._assigned.get(host, (None, 0.0))[0]
+
+        choices = [agent for agent in self.agents if agent != previous] or self.agents
+        agent = random.choice(choices)
+        self._assigned[host] = (agent, time.monotonic())
+        return agent
+
+
+def rotate_after_from_env() -> Optional[float]:
+    """USER_AGENT_ROTATE_AFTER in seconds, None (sticky) when unset or empty"""
+    value = os.getenv('USER_AGENT_ROTATE_AFTER')
+    return float(value) if value else None
+
+
+def user_agent_for(provider, url: str) -> str:
+    """
+    Sticky agent for url when the provider supports it, any agent otherwise.
+
+    provider may also be a function returning it, so building a fetcher does
+    not load the pool before the first request needs it.
+    """
+    if callable(provider) and not hasattr(provider, 'random'):
+        provider = provider()
+
+    if hasattr(provider, 'for_host'):
+        return provider.for_host(url)
+    return provider.random
+
+
+def refresh(path: Path = USER_AGENTS_FILE, size: int = POOL_SIZE) -> List[str]:
+    """
+    Rewrite the pool with the most common desktop agents from fake-useragent's dataset.
+    """
+    from fake_useragent import UserAgent
+
+    browsers = [
+        browser for browser in UserAgent().data_browsers
+        if browser['type'] == 'desktop' and browser['browser'] in ('Chrome', 'Firefox', 'Edge', 'Safari')
+        and 'Mobile' not in browser['useragent']
+    ]
+    browsers = sorted(browsers, key=lambda browser: browser['percent'], reverse=True)
+
+    agents = []
+    for browser in browsers:
+        if browser['useragent'] not in agents:
+            agents.append(browser['useragent'])
+        if len(agents) == size:
+            break
+
+    path.write_text(json.dumps(agents, indent=4) + "\n", encoding='utf-8')
+    return agents
+
+
+if __name__ == '__main__':
+    agents = refresh()
+    print(f"wrote {len(agents)} user agents to {USER_AGENTS_FILE}")
+    sys.exit(0)
@@ -2,11 +2,14 @@ from dataclasses import dataclass
 
 from parsers.output import Result
 from interfaces.tracker import ChangeTracker
-from interfaces.content import ContentFetcher
+from interfaces.content import ContentFetcher, ContentStream, NOT_MODIFIED
 from processing.pipeline import ProcessingPipeline
+from processing.timing import timed, record_rows
+from processing.fingerprint import content_fingerprint
 
 from typing import Dict, Optional, List, Any
 from abc import ABC, abstractmethod
+from logs import logger as log
 import pandas as pd
 
 @dataclass
@@ -17,6 +20,7 @@ class ParserDependencies:
     fetcher: ContentFetcher
     pipeline: ProcessingPipeline
     tracker: ChangeTracker
+    fingerprints: Optional[ChangeTracker] = None  # raw content hash per site entry
 
 
 class BaseParser(ABC):
@@ -24,10 +28,14 @@ class BaseParser(ABC):
     Base parser following SOLID principles.
     """
 
+    # parsers that set this implement _extract_chunks(content, selectors) -> AsyncIterator[pd.DataFrame]
+    supports_stream = False
+
     def __init__(self, dependencies: ParserDependencies, parser_type: str):
         self.fetcher = dependencies.fetcher
         self.pipeline = dependencies.pipeline
         self.tracker = dependencies.tracker
+        self.fingerprints = dependencies.fingerprints
         self.parser_type = parser_type
 
     @abstractmethod
@@ -45,20 +53,47 @@ class BaseParser(ABC):
             return None
 
         # Step 1: Fetch content (strategy depends on injected fetcher)
-        content = await self.fetcher.fetch(**config)
+        with timed('fetch'):
+            content = await self.fetcher.fetch(**config)
+
+        # Server says nothing changed (304), skip extraction and pipeline
+        if content is NOT_MODIFIED:
+            log.info(f"{self.parser_type}: {config['url']} not modified")
+            return None
+
         if not content:
             return None
 
+        if isinstance(content, ContentStream):
+            if not self.supports_stream:  # verify() rejects `stream` for these parser types
+                log.error(f"{self.parser_type}: streamed content is not supported ({config['url']})")
+                await content.aclose()
+                return None
+            return await self._parse_stream(content, config)
+
+        # Same bytes as last time (ignoring volatile regions), skip extraction and pipeline
+        fingerprint = None
+        if self.fingerprints is not None:
+            fingerprint = content_fingerprint(content, config.get('volatile'))
+            if fingerprint is not None and self.fingerprints.get(self._entry_key(config)) == fingerprint:
+                log.info(f"{self.parser_type}: {config['url']} content unchanged")
+                return None
+
         # Step 2: Extract data (strategy depends on subclass)
-        extracted_data = await self._extract_data(content, selectors)
-        if not extracted_data or not any(extracted_data.values()):
-            return None
+        with timed('extract'):
+            extracted_data = await self._extract_data(content, selectors)
+            if not extracted_data or not any(extracted_data.values()):
+                self._remember(config, fingerprint)
+                return None
 
-        # Step 3: Convert to dataframe
-        df = pd.DataFrame(extracted_data)
+            # Step 3: Convert to dataframe
+            df = pd.DataFrame(extracted_data)
+        record_rows('extracted', len(df))
 
         # Step 4: Run processing pipeline
-        df = await self.pipeline.execute(df, config, self.parser_type)
+        with timed('pipeline'):
+            df = await self.pipeline.execute(df, config, self.parser_type)
+        self._remember(config, fingerprint)
 
         if df.empty:
             return None
@@ -66,3 +101,40 @@ class BaseParser(ABC):
         # Step 5: Return result
         from parsers.output import Result
         return Result(self.parser_type, **(df.to_dict(orient='list')))
+
+    async def _parse_stream(self, content: ContentStream, config: dict) -> Optional['Result']:
+        """
+        Streamed flow - chunks go through the pipeline as they are parsed.
+        """
+        async def chunks():
+            try:
+                iterator = self._extract_chunks(content, config['selectors']).__aiter__()
+                while True:
+                    with timed('extract'):
+                        try:
+                            df = await iterator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                    record_rows('extracted', len(df))
+                    yield df
+            finally:
+                await content.aclose()
+
+        with timed('pipeline'):
+            df = await self.pipeline.execute_stream(chunks(), config, self.parser_type)
+
+        if df.empty:
+            return None
+
+        from parsers.output import Result
+        return Result(self.parser_type, **(df.to_dict(orient='list')))
+
+    @staticmethod
+    def _entry_key(config: dict) -> str:
+        """Fingerprints are per site entry: its name, or its url and selectors when it has none"""
+        return config.get('name') or f"{config['url']} {sorted(config['selectors'].items(), key=str)}"
+
+    def _remember(self, config: dict, fingerprint: Optional[str]) -> None:
+        """Store the fingerprint once the content has been fully processed"""
+        if fingerprint is not None:
+            self.fingerprints.track(self._entry_key(config), fingerprint)
@@ -0,0 +1,101 @@
+import asyncio
+from io import BytesIO
+from typing import List, Optional, AsyncIterator
+
+import pandas as pd
+
+from interfaces.content import ContentStream
+
+'''
+incremental csv parsing for streamed downloads
+
+bytes are cut into blocks of complete records as they arrive and each
+block is parsed on its own, so memory stays around one block no matter
+how large the export is. a newline only ends a record when it is outside
+quotes, i.e. when the number of '"' before it is even ("" escapes keep
+the count even).
+'''
+
+BLOCK_SIZE = 1024 * 1024  # ~1 MiB of csv per parsed chunk
+
+
+class CsvChunker:
+    """
+    Splits a csv byte stream into blocks of whole records, each prefixed with the header.
+    """
+
+    def __init__(self, block_size: int = BLOCK_SIZE):
+        self.block_size = block_size
+        self.header: Optional[bytes] = None
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        self._buffer.extend(data)
+        blocks = []
+
+        if self.header is None:
+            end = self._record_end(len(self._buffer))
+            if end is None:
+                return blocks
+            self.header = bytes(self._buffer[:end])
+            del self._buffer[:end]
+
+        while len(self._buffer) >= self.block_size:
+            end = self._record_end(len(self._buffer))
+            if end is None:
+                break
+            blocks.append(self.header + bytes(self._buffer[:end]))
+            del self._buffer[:end]
+
+        return blocks
+
+    def flush(self) -> Optional[bytes]:
+        """Whatever is left once the stream ends"""
+        if self.header is None:
+            header, self.header = bytes(self._buffer), b''
+            self._buffer.clear()
+            return header or None
+
+        if not self._buffer.strip():
+            return None
+
+        block = self.header + bytes(self._buffer)
+        self._buffer.clear()
+        return block
+
+    def _record_end(self, limit: int) -> Optional[int]:
+        """
+        Offset just past the last record separator before limit (the first one while reading the header).
+        """
+        if self.header is None:
+            start = 0
+            while True:
+                newline = self._buffer.find(b'\n', start, limit)
+                if newline == -1:
+                    return None
+                if self._buffer.count(b'"', 0, newline) % 2 == 0:
+                    return newline + 1
+                start = newline + 1
+
+        newline = self._buffer.rfind(b'\n', 0, limit)
+        while newline != -1:
+            if self._buffer.count(b'"', 0, newline) % 2 == 0:
+                return newline + 1
+            newline = self._buffer.rfind(b'\n', 0, newline)
+        return None
+
+
+async def iter_csv_chunks(stream: ContentStream, block_size: int = BLOCK_SIZE) -> AsyncIterator[pd.DataFrame]:
+    """
+    Parse a streamed csv into DataFrames as the bytes arrive.
+    """
+    chunker = CsvChunker(block_size)
+    encoding = stream.encoding or 'utf-8'
+
+    async for data in stream:
+        for block in chunker.feed(data):
+            yield await asyncio.to_thread(pd.read_csv, BytesIO(block), encoding=encoding)
+
+    block = chunker.flush()
+    if block:
+        yield await asyncio.to_thread(pd.read_csv, BytesIO(block), encoding=encoding)
@@ -4,10 +4,15 @@ from parsers.base_parser import ParserDependencies
 from interfaces.content import ContentFetcher
 from parsers.parser_types import DownloadParser, StaticContentParser, JavaScriptContentParser, SeleniumDownloadParser
 from processing.data_processor import ChangeDetectionProcessor, NameRegularizationProcessor, PositionNormalizationProcessor, \
-    DateFilterProcessor, IgnoreDataWithFlagProcessor, ColumnRegularizationProcessor
+    DateFilterProcessor, IgnoreDataWithFlagProcessor, ColumnRegularizationProcessor, SeenPostingProcessor
 from processing.fetchers import HttpContentFetcher, SeleniumContentFetcher, DownloadFetcher, AirtableSeleniumFetcher
 from interfaces.data import DataProcessor
 from processing.pipeline import ProcessingPipeline
+from processing.tracker import Tracker
+from net.conditional import ValidatorCache
+from net.host_scheduler import HostScheduler
+from net.single_flight import SingleFlight
+from net.airtable import AirtableEndpointCache
 from robots.cache import InMemoryRobotsCache
 from robots.parser import RobotsTxtParser
 from robots.refresher import RobotsCacheRefresher
@@ -17,28 +22,63 @@ from logs import logger as log
 class ParserFactory:
     """
     Creates parsers with proper dependencies.
+
+    browser manager, user agent provider and robots parser are only built
+    (and their modules imported) the first time a parser needs them. fetchers
+    get the user agent provider as `lambda: self.ua_provider`, so it is only
+    loaded by their first request.
     """
 
-    def __init__(self, session, browser_manager, tracker, user_agent_provider, enable_robots_refresh=None):
+    def __init__(self, session, browser_manager=None, tracker=None, user_agent_provider=None,
+                 enable_robots_refresh=None, seen_store=None):
         self.session = session
-        self.browser_manager = browser_manager
-        self.tracker = tracker
-        self.ua_provider = user_agent_provider
+        self.tracker = tracker if tracker is not None else Tracker()
+        self.seen_store = seen_store  # shared across replicas when set
+        self.enable_robots_refresh = enable_robots_refresh
 
-        self.robots_cache = InMemoryRobotsCache()
-        self.robots_parser = RobotsTxtParser(self.robots_cache)
+        self._browser_manager = browser_manager
+        self._ua_provider = user_agent_provider
+        self._robots_parser = None
 
-        # Optionally start background refresh
+        self.robots_cache = None
         self.robots_refresher = None
 
-        if enable_robots_refresh:
-            self.robots_refresher = RobotsCacheRefresher(
-                self.robots_parser,
-                self.robots_cache,
-                refresh_interval_hours=24
-            )
-            self.robots_refresher.start()
-            self.robots_refresher.set_global_instance(self.robots_refresher) # for auto clean up
+        self.validators = ValidatorCache()  # ETag / Last-Modified per site entry
+        self.fingerprints = Tracker()  # raw content hash per site entry
+        self.single_flight = SingleFlight()  # one request for entries on the same url
+        self.host_scheduler = HostScheduler()  # politeness and circuit breaking shared by every fetcher
+
+    @property
+    def browser_manager(self):
+        if self._browser_manager is None:
+            from net.browser_manager import BrowserManager
+            self._browser_manager = BrowserManager()
+        return self._browser_manager
+
+    @property
+    def ua_provider(self):
+        if self._ua_provider is None:
+            from net.user_agents import UserAgentPool, rotate_after_from_env
+            self._ua_provider = UserAgentPool.load(rotate_after=rotate_after_from_env())
+        return self._ua_provider
+
+    @property
+    def robots_parser(self):
+        if self._robots_parser is None:
+            self.robots_cache = InMemoryRobotsCache()
+            self._robots_parser = RobotsTxtParser(self.robots_cache)
+
+            # Optionally start background refresh
+            if self.enable_robots_refresh:
+                self.robots_refresher = RobotsCacheRefresher(
+                    self._robots_parser,
+                    self.robots_cache,
+                    refresh_interval_hours=24
+                )
+                self.robots_refresher.start()
+                self.robots_refresher.set_global_instance(self.robots_refresher) # for auto clean up
+
+        return self._robots_parser
 
     def create_download_parser(self, processors: List[DataProcessor] = None) -> DownloadParser:
         """
@@ -56,7 +96,8 @@ class ParserFactory:
             ])
         """
         log.info("Creating download parser")
-        fetcher = DownloadFetcher(self.session, self.ua_provider)
+        fetcher = DownloadFetcher(self.session, lambda: self.ua_provider, self.validators, raw=True,
+                                  host_scheduler=self.host_scheduler, single_flight=self.single_flight)
 
         if processors is None:
             # Default processors for download parser
@@ -69,15 +110,19 @@ class ParserFactory:
                 ChangeDetectionProcessor(self.tracker)
             ]
 
+            if self.seen_store is not None:
+                processors.append(SeenPostingProcessor(self.seen_store))
+
         pipeline = ProcessingPipeline(processors)
-        deps = ParserDependencies(fetcher, pipeline, self.tracker)
+        deps = ParserDependencies(fetcher, pipeline, self.tracker, self.fingerprints)
 
         return DownloadParser(deps)
 
     def create_static_parser(self, processors: List[DataProcessor] = None) -> StaticContentParser:
         """Create static parser with specified processors"""
         log.info("Creating static parser")
-        fetcher = HttpContentFetcher(self.session, self.ua_provider, self.robots_parser)
+        fetcher = HttpContentFetcher(self.session, lambda: self.ua_provider, self.robots_parser, self.validators,
+                                     raw=True, host_scheduler=self.host_scheduler, single_flight=self.single_flight)
 
         if processors is None:
             processors = [
@@ -88,15 +133,19 @@ class ParserFactory:
                 ChangeDetectionProcessor(self.tracker)
             ]
 
+            if self.seen_store is not None:
+                processors.append(SeenPostingProcessor(self.seen_store))
+
         pipeline = ProcessingPipeline(processors)
-        deps = ParserDependencies(fetcher, pipeline, self.tracker)
+        deps = ParserDependencies(fetcher, pipeline, self.tracker, self.fingerprints)
 
         return StaticContentParser(deps)
 
     def create_js_parser(self, processors: List[DataProcessor] = None) -> JavaScriptContentParser:
         """Create JS parser with specified processors"""
         log.info("Creating JS parser")
-        fetcher = SeleniumContentFetcher(self.browser_manager, self.ua_provider, self.robots_parser)
+        fetcher = SeleniumContentFetcher(self.browser_manager, lambda: self.ua_provider, self.robots_parser,
+                                         host_scheduler=self.host_scheduler)
 
         if processors is None:
             processors = [
@@ -107,8 +156,11 @@ class ParserFactory:
                 ChangeDetectionProcessor(self.tracker)
             ]
 
+            if self.seen_store is not None:
+                processors.append(SeenPostingProcessor(self.seen_store))
+
         pipeline = ProcessingPipeline(processors)
-        deps = ParserDependencies(fetcher, pipeline, self.tracker)
+        deps = ParserDependencies(fetcher, pipeline, self.tracker, self.fingerprints)
 
         return JavaScriptContentParser(deps)
 
@@ -126,7 +178,8 @@ class ParserFactory:
         # Create Airtable-specific fetcher
         log.info("Creating Selenium download parser")
         if fetcher is None:
-            fetcher = AirtableSeleniumFetcher(self.browser_manager)
+            fetcher = AirtableSeleniumFetcher(self.browser_manager, self.host_scheduler, self.session,
+                                              AirtableEndpointCache())
 
         if processors is None:
             processors = [
@@ -138,7 +191,10 @@ class ParserFactory:
                 ChangeDetectionProcessor(self.tracker)
             ]
 
+            if self.seen_store is not None:
+                processors.append(SeenPostingProcessor(self.seen_store))
+
         pipeline = ProcessingPipeline(processors)
-        deps = ParserDependencies(fetcher, pipeline, self.tracker)
+        deps = ParserDependencies(fetcher, pipeline, self.tracker, self.fingerprints)
 
         return SeleniumDownloadParser(deps)
\ No newline at end of file
@@ -1,12 +1,70 @@
-from io import StringIO
+from io import StringIO, BytesIO
 
-from net.browser_manager import BrowserManager
+from interfaces.content import ContentStream, RawContent
 from parsers.base_parser import BaseParser, ParserDependencies
-from typing import Dict, List, Any
+from parsers.csv_stream import iter_csv_chunks
+from typing import Dict, List, Any, AsyncIterator
 from logs import logger as log
 import asyncio
 import pandas as pd
 
+# every selector evaluated in the page in one round trip (same results as find_elements + .text / href)
+EXTRACT_SCRIPT = """
+const selectors = arguments[0];
+const extracted = {};
+for (const [key, selector] of Object.entries(selectors)) {
+    let elements;
+    try {
+        elements = Array.from(document.querySelectorAll(selector));
+    } catch (e) {
+        extracted[key] = [];  // invalid selector
+        continue;
+    }
+    const texts = elements.map(element => (element.innerText || '').trim());
+    if (key === 'application_link') {
+        extracted[key] = elements.map((element, i) => element.href || texts[i]);
+    } else {
+        extracted[key] = texts.filter(text => text);
+    }
+}
+return extracted;
+"""
+
+def extract_html(content: Any, selectors: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Run css selectors over an html document (str or RawContent).
+    """
+    from bs4 import BeautifulSoup
+    if isinstance(content, RawContent):
+        soup = BeautifulSoup(content.body, 'html.parser', from_encoding=content.encoding)
+    else:
+        soup = BeautifulSoup(content, 'html.parser')
+
+    extracted = {}
+    for key, selector in selectors.items():
+        elements = soup.select(selector)
+        if elements:
+            if key == "application_link":
+                extracted[key] = [
+                    elem.get("href") if elem.has_attr("href")
+                    else elem.get_text(strip=True)
+                    for elem in elements
+                ]
+            else:
+                extracted[key] = [elem.get_text(strip=True) for elem in elements]
+
+    return extracted
+
+
+def read_csv(content: Any) -> pd.DataFrame:
+    """
+    Read csv text, or raw bytes without decoding them first.
+    """
+    if isinstance(content, RawContent):
+        return pd.read_csv(BytesIO(content.body), encoding=content.encoding or 'utf-8')
+    return pd.read_csv(StringIO(content))
+
+
 class DownloadParser(BaseParser):
     """
     CSV download parser.
@@ -15,14 +73,20 @@ class DownloadParser(BaseParser):
     All other concerns handled by injected dependencies.
     """
 
+    supports_stream = True
+
     def __init__(self, dependencies: ParserDependencies):
         super().__init__(dependencies, "DOWNLOAD_PARSER")
 
     async def _extract_data(self, content: Any, selectors: Dict[str, str]) -> Dict[str, List[str]]:
-        df = await asyncio.to_thread(pd.read_csv, StringIO(content))
+        df = await asyncio.to_thread(read_csv, content)
 
         return df.to_dict(orient='list')
 
+    async def _extract_chunks(self, content: ContentStream, selectors: Dict[str, str]) -> AsyncIterator[pd.DataFrame]:
+        async for df in iter_csv_chunks(content):
+            yield df
+
 
 class StaticContentParser(BaseParser):
     """
@@ -34,29 +98,15 @@ class StaticContentParser(BaseParser):
 
     async def _extract_data(self, content: Any, selectors: Dict[str, str]) -> Dict[str, List[str]]:
         log.info(f"StaticContentParser: Extracting {selectors}")
-
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(content, 'html.parser')
-
-        extracted = {}
-        for key, selector in selectors.items():
-            elements = soup.select(selector)
-            if elements:
-                if key == "application_link":
-                    extracted[key] = [
-                        elem.get("href") if elem.has_attr("href")
-                        else elem.get_text(strip=True)
-                        for elem in elements
-                    ]
-                else:
-                    extracted[key] = [elem.get_text(strip=True) for elem in elements]
-
-        return extracted
+        return extract_html(content, selectors)
 
 
 class JavaScriptContentParser(BaseParser):
     """
     Selenium-based parser.
+
+    Extracts from the live page, or from the rendered html (render: snapshot)
+    with the same engine as StaticContentParser.
     """
 
     def __init__(self, dependencies: ParserDependencies):
@@ -65,32 +115,24 @@ class JavaScriptContentParser(BaseParser):
     async def _extract_data(self, content: Any, selectors: Dict[str, str]) -> Dict[str, List[str]]:
         log.info(f"JavaScriptContentParser: Extracting {selectors}")
 
-        from selenium.webdriver.common.by import By
+        # Snapshot of the rendered page, the browser is already back in the pool
+        if isinstance(content, (str, RawContent)):
+            return extract_html(content, selectors)
+
+        from net.browser_manager import BrowserManager
         driver = content
 
-        # Wait for content to load
-        await asyncio.sleep(25)
-        try:
-            extracted_data = {}
-            if selectors:
-                for key, selector in selectors.items():
-                    try:
-                        elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                        if key == "application_link":
-                            extracted_data[key] = [
-                                elem.get_attribute("href") or elem.text.strip()
-                                for elem in elements
-                            ]
-                        else:
-                            extracted_data[key] = [elem.text.strip() for elem in elements if elem.text.strip()]
-
-                        await asyncio.sleep(0)
-                    except Exception:
-                        extracted_data[key] = []
+        selectors = {key: selector for key, selector in (selectors or {}).items() if isinstance(selector, str)}
 
-            return extracted_data
+        # The fetcher already waited for the page to be ready
+        try:
+            # one execute_script instead of a find_elements / .text round trip per element
+            return await BrowserManager().run(driver.execute_script, EXTRACT_SCRIPT, selectors)
+        except Exception as e:
+            log.error(f"JavaScriptContentParser: Extraction failed: {e}")
+            return {}
         finally:
-            await BrowserManager().close_browser(driver)
+            await BrowserManager().release(driver)
 
 
 class SeleniumDownloadParser(BaseParser):
@@ -101,7 +143,7 @@ class SeleniumDownloadParser(BaseParser):
     def __init__(self, dependencies: ParserDependencies):
         super().__init__(dependencies, "AIRTABLE_SELENIUM_PARSER")
 
-    async def _extract_data(self, content: str, selectors: Dict[str, str]) -> Dict[str, List[str]]:
+    async def _extract_data(self, content: Any, selectors: Dict[str, str]) -> Dict[str, List[str]]:
         """
         Extract data from CSV content.
         """
@@ -112,7 +154,7 @@ class SeleniumDownloadParser(BaseParser):
             log.info(f"SeleniumDownloadParser: Extracting {selectors}")
 
             # Parse CSV
-            df = await asyncio.to_thread(pd.read_csv, StringIO(content))
+            df = await asyncio.to_thread(read_csv, content)
 
             # Extract columns based on selectors
             extracted_data = {}
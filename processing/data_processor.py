@@ -1,5 +1,6 @@
 from interfaces.data import DataProcessor
 from interfaces.tracker import ChangeTracker
+from interfaces.coordination import SeenStore
 from typing import List, Dict, Any
 from datetime import datetime
 import pandas as pd
@@ -110,6 +111,8 @@ class NameRegularizationProcessor(DataProcessor):
     by treating certain chars as null.
     """
 
+    streamable = False  # forward fill crosses chunk boundaries
+
     def __init__(self, include_parsers: List[str] = None, exclude_parsers: List[str] = None):
         self.include = include_parsers
         self.exclude = exclude_parsers or []
@@ -157,6 +160,8 @@ class ChangeDetectionProcessor(DataProcessor):
     Detects changes using hash tracking and filters to new rows only.
     """
 
+    streamable = False  # needs the newest row of the whole download
+
     def __init__(self, tracker: ChangeTracker,
                  include_parsers: List[str] = None,
                  exclude_parsers: List[str] = None):
@@ -173,7 +178,7 @@ class ChangeDetectionProcessor(DataProcessor):
         if df.empty:
             return df
 
-        url = config['url']
+        url = config.get('name', config['url'])  # entries sharing a url track their own newest row
 
         hash_val = self.tracker.get(url)
         content_hash = str(df.iloc[0].tolist())
@@ -196,4 +201,37 @@ class ChangeDetectionProcessor(DataProcessor):
             match_idx = match_mask.idxmax()
             return df.loc[:match_idx - 1] if match_idx > 0 else pd.DataFrame(columns=df.columns)
 
-        return df
\ No newline at end of file
+        return df
+
+
+class SeenPostingProcessor(DataProcessor):
+    """
+    Drops postings already published by any replica sharing the seen store.
+    """
+
+    def __init__(self, seen_store: SeenStore,
+                 include_parsers: List[str] = None,
+                 exclude_parsers: List[str] = None):
+        self.seen_store = seen_store
+        self.include = include_parsers
+        self.exclude = exclude_parsers or []
+
+    def applies_to(self, parser_type: str) -> bool:
+        if self.include is not None:
+            return parser_type in self.include
+        return parser_type not in self.exclude
+
+    async def process(self, df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFrame:
+        if df.empty:
+            return df
+
+        columns = [column for column in ('company_name', 'position', 'application_link') if column in df.columns]
+        if columns:
+            keys = df[columns].astype(str).agg('|'.join, axis=1)
+        else:
+            # no posting identity, the whole row is the key
+            keys = pd.util.hash_pandas_object(df.astype(str), index=False).astype(str)
+
+        new_keys = await self.seen_store.add_new(keys.tolist())
+
+        return df[keys.isin(new_keys)]
@@ -1,26 +1,54 @@
-from interfaces.content import  ContentFetcher
-from typing import Optional, Any, List
+from interfaces.content import  ContentFetcher, ContentStream, RawContent, NOT_MODIFIED
+from typing import Optional, Any, List, AsyncIterator
 import asyncio
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import time
 
 from interfaces.robots import RobotsParser
+from net.host_scheduler import HostScheduler, parse_retry_after
+from net.single_flight import SingleFlight
+from net.user_agents import user_agent_for
+from net.readiness import Readiness, render_mode, wait_until_ready
+from net.downloads import wait_for_download, wait_for_remote_download, DOWNLOAD_TIMEOUT
+from net.resource_policy import blocked_urls
+from net.airtable import AirtableEndpointCache, export_mode, find_csv_request
+from processing.timing import timed
 from logs import logger as log
 
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRIES = 2  # extra attempts after a 429/503 (only when the pause is short)
+
+
+async def respect_robots(base_url: str, url: str, user_agent: str, robots_parser: RobotsParser,
+                         host_scheduler: Optional[HostScheduler] = None) -> bool:
+    with timed('robots'):
+        # Check robots.txt
+        rules = await robots_parser.get_rules(url, base_url, user_agent)
+
+        if not rules.can_fetch:
+            log.warning(f"Robots.txt disallows fetching: {url}")
+            return False
+
+        # Respect crawl delay (only waits for what is left since the host was last contacted)
+        if host_scheduler is not None:
+            await host_scheduler.wait(url, rules.crawl_delay)
+        else:
+            await asyncio.sleep(rules.crawl_delay)
+        return rules.can_fetch
 
-async def respect_robots(base_url: str, url: str, user_agent: str, robots_parser: RobotsParser) -> bool:
-    # Check robots.txt
-    rules = await robots_parser.get_rules(url, base_url, user_agent)
 
-    if not rules.can_fetch:
-        log.warning(f"Robots.txt disallows fetching: {url}")
+def should_retry(host_scheduler: HostScheduler, url: str, response, attempt: int, name: str) -> bool:
+    """
+    Record a throttle response with the host scheduler, True if the request is worth another attempt.
+    """
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    wait = host_scheduler.record_throttled(url, retry_after)
+
+    if attempt >= MAX_RETRIES or wait > host_scheduler.max_wait:
+        log.warning(f"{name}: {response.status} from {url}, giving up")
         return False
 
-    # Respect crawl delay
-    await asyncio.sleep(rules.crawl_delay)
-    return rules.can_fetch
+    log.warning(f"{name}: {response.status} from {url}, retrying in {wait:.0f}s")
+    return True
 
 
 class HttpContentFetcher(ContentFetcher):
@@ -28,30 +56,86 @@ class HttpContentFetcher(ContentFetcher):
     Fetches content via HTTP.
     """
 
-    def __init__(self, session, user_agent_provider, robots_parser):
+    def __init__(self, session, user_agent_provider, robots_parser, validators=None, raw=False,
+                 host_scheduler=None, single_flight=None):
         self.session = session
         self.ua_provider = user_agent_provider
         self.robots_parser = robots_parser
+        self.host_scheduler = host_scheduler or HostScheduler()  # shared politeness / circuit breaker
+        self.single_flight = single_flight or SingleFlight()  # shared by entries on the same url
+        self.validators = validators  # ValidatorCache, enables conditional GETs
+        self.raw = raw  # return RawContent (bytes + declared charset) instead of decoded text
 
     async def fetch(self, url: str, **kwargs) -> Optional[Any]:
-        can_parse = await respect_robots(kwargs.get('base_url'), url, self.ua_provider.random, self.robots_parser)
+        if not self.host_scheduler.allow(url):
+            log.warning(f"HttpContentFetcher: Host backing off, skipping {url}")
+            return None
+
+        key = kwargs.get('name', url)  # validators are per site entry
+        accept = kwargs.get('accept', 'text/html')
+        conditional = self.validators.headers(key) if self.validators is not None else {}
+
+        shared = await self.single_flight.do(
+            (url, accept, self.raw, tuple(sorted(conditional.items()))),
+            lambda: self._fetch(url, kwargs.get('base_url'), accept, conditional)
+        )
+        if shared is None:
+            return None
+
+        content, response_headers = shared
+        if response_headers is not None and self.validators is not None:
+            self.validators.update(key, response_headers)
+
+        return content
+
+    async def _fetch(self, url: str, base_url: str, accept: str, conditional: dict) -> Optional[tuple]:
+        """
+        Robots check and request. Returns (content, response headers), headers None for a 304.
+        """
+        user_agent = user_agent_for(self.ua_provider, url)  # robots rules apply to the agent we send
+        can_parse = await respect_robots(base_url, url, user_agent, self.robots_parser, self.host_scheduler)
 
         if not can_parse:
             return None
 
-        accept = kwargs.get('accept', 'text/html')
         headers = {
-            "User-Agent": self.ua_provider.random,
-            "Accept": accept
+            "User-Agent": user_agent,
+            "Accept": accept,
+            **conditional
         }
 
         try:
             log.info(f"HttpContentFetcher: Fetching Content from {url}")
-            async with self.session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                return await response.text()
+            for attempt in range(MAX_RETRIES + 1):
+                if attempt:
+                    await self.host_scheduler.wait(url, 0)
+
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status in THROTTLE_STATUSES:
+                        if should_retry(self.host_scheduler, url, response, attempt, "HttpContentFetcher"):
+                            continue
+                        break
+
+                    if response.status == 304:
+                        log.info(f"HttpContentFetcher: Not modified {url}")
+                        self.host_scheduler.record_success(url)
+                        return NOT_MODIFIED, None
+
+                    response.raise_for_status()
+                    if self.raw:
+                        content = RawContent(await response.read(), response.charset)
+                    else:
+                        content = await response.text()
+
+                    self.host_scheduler.record_success(url)
+                    return content, response.headers
+
+            # still throttled
+            self.host_scheduler.record_failure(url)
+            return None
         except Exception as e:
             log.error(f"Error fetching {url}: {e}")
+            self.host_scheduler.record_failure(url)
             return None
 
 
@@ -60,62 +144,170 @@ class SeleniumContentFetcher(ContentFetcher):
     Fetches content via Selenium/browser.
     """
 
-    def __init__(self, browser_manager, user_agent_provider, robots_parser):
+    def __init__(self, browser_manager, user_agent_provider, robots_parser, host_scheduler=None):
         self.robots_parser = robots_parser
         self.browser_manager = browser_manager
         self.ua_provider = user_agent_provider
+        self.host_scheduler = host_scheduler or HostScheduler()  # shared politeness / circuit breaker
 
     async def fetch(self, url: str, **kwargs) -> Optional[Any]:
-        can_parse = await respect_robots(kwargs.get('base_url'), url, self.ua_provider.random, self.robots_parser)
+        if not self.host_scheduler.allow(url):
+            log.warning(f"SeleniumContentFetcher: Host backing off, skipping {url}")
+            return None
+
+        # same agent for robots.txt and the page
+        user_agent = user_agent_for(self.ua_provider, url)
+        can_parse = await respect_robots(kwargs.get('base_url'), url, user_agent, self.robots_parser,
+                                         self.host_scheduler)
 
         if not can_parse:
             return None
 
+        driver = None
         try:
-            driver = await self.browser_manager.create_browser()
-            driver.get(url)
-            await asyncio.sleep(10) #wait for content to load
+            driver = await self.browser_manager.lease(blocked_urls=blocked_urls(kwargs), user_agent=user_agent)
+            await self.browser_manager.run(driver.get, url)
+
+            # wait for content to load (selectors / network / DOM, see net/readiness.py)
+            await self.browser_manager.run(wait_until_ready, driver, Readiness.from_config(kwargs))
+
+            # Capture the rendered DOM and give the browser back before extraction
+            if render_mode(kwargs) == 'snapshot':
+                html = await self.browser_manager.run(lambda: driver.page_source)
+                await self.browser_manager.release(driver)
+                driver = None
+
+                log.info(f"SeleniumContentFetcher: Captured rendered page for {url}")
+                self.host_scheduler.record_success(url)
+                return RawContent(html.encode('utf-8'), 'utf-8')
 
             log.info(f"HttpContentFetcher: Fetching Content (driver) for {url}")
+            self.host_scheduler.record_success(url)
             return driver
 
         except Exception as e:
             log.error(f"Error fetching with Selenium {url}: {e}")
-            try:
-                await self.browser_manager.close_tab()
-            except:
-                pass
+            self.host_scheduler.record_failure(url)
+            if driver is not None:
+                await self.browser_manager.release(driver)
             return None
 
 
+class ResponseStream(ContentStream):
+    """
+    Body of an open HTTP response, read in chunks.
+    """
+
+    def __init__(self, response, chunk_size: int = 64 * 1024):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.encoding = response.charset
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for data in self.response.content.iter_chunked(self.chunk_size):
+            yield data
+
+    async def aclose(self) -> None:
+        self.response.release()
+
+
 class DownloadFetcher(ContentFetcher):
     """
     Fetches content via HTTP.
     """
 
-    def __init__(self, session, user_agent_provider):
+    def __init__(self, session, user_agent_provider, validators=None, raw=False, host_scheduler=None,
+                 single_flight=None):
         self.session = session
         self.ua_provider = user_agent_provider
+        self.validators = validators  # ValidatorCache, enables conditional GETs
+        self.raw = raw  # return RawContent (bytes + declared charset) instead of decoded text
+        self.host_scheduler = host_scheduler or HostScheduler()  # shared circuit breaker
+        self.single_flight = single_flight or SingleFlight()  # shared by entries on the same url
 
     async def fetch(self, url: str, **kwargs) -> Optional[Any]:
+        if not self.host_scheduler.allow(url):
+            log.warning(f"(Download Parser) Host backing off, skipping {url}")
+            return None
+
+        key = kwargs.get('name', url)  # validators are per site entry
         accept = kwargs.get('accept', 'text/csv')
+        conditional = self.validators.headers(key) if self.validators is not None else {}
+
+        # An open stream belongs to one reader, only buffered downloads are shared
+        if kwargs.get('stream'):
+            shared = await self._fetch(url, accept, conditional, stream=True)
+        else:
+            shared = await self.single_flight.do(
+                (url, accept, self.raw, tuple(sorted(conditional.items()))),
+                lambda: self._fetch(url, accept, conditional)
+            )
+        if shared is None:
+            return None
+
+        content, response_headers = shared
+        if response_headers is not None and self.validators is not None:
+            self.validators.update(key, response_headers)
+
+        return content
+
+    async def _fetch(self, url: str, accept: str, conditional: dict, stream: bool = False) -> Optional[tuple]:
+        """
+        Download url. Returns (content, response headers), headers None for a 304.
+        """
         headers = {
-            "User-Agent": self.ua_provider.random,
-            "Accept": accept
+            "User-Agent": user_agent_for(self.ua_provider, url),
+            "Accept": accept,
+            **conditional
         }
 
         response = None
         try:
             log.info(f"DownloadFetcher: fetching content from {url}")
-            # If page is no longer accessible download should not work
-            async with self.session.get(url, headers=headers) as response:
+            for attempt in range(MAX_RETRIES + 1):
+                await self.host_scheduler.wait(url, 0)  # honours Retry-After / slowdown of the host
+
+                # If page is no longer accessible download should not work
+                response = await self.session.get(url, headers=headers)
+                if response.status not in THROTTLE_STATUSES:
+                    break
+
+                retry = should_retry(self.host_scheduler, url, response, attempt, "DownloadFetcher")
+                response.release()
+                response = None
+                if not retry:
+                    break
+
+            if response is None:  # still throttled
+                self.host_scheduler.record_failure(url)
+                return None
+
+            try:
+                if response.status == 304:
+                    log.info(f"DownloadFetcher: Not modified {url}")
+                    self.host_scheduler.record_success(url)
+                    return NOT_MODIFIED, None
+
                 response.raise_for_status()
-                content = await response.text()
+                self.host_scheduler.record_success(url)
+
+                # Hand the open response to the parser, body is read as it is parsed
+                if stream:
+                    body, response = ResponseStream(response), None
+                    return body, body.response.headers
+
+                if self.raw:
+                    return RawContent(await response.read(), response.charset), response.headers
+
+                return await response.text(), response.headers
+            finally:
+                if response is not None:
+                    response.release()
 
-            return content
         except Exception as e:
 
             log.error(f"(Download Parser) Error fetching : {url}: {e}")
+            self.host_scheduler.record_failure(url)
             return None
 
 # may want to add use_thread: bool if number of instances of fetcher is more then cpu cores
@@ -124,51 +316,123 @@ class AirtableSeleniumFetcher(ContentFetcher):
     Fetches CSV data from Airtable by clicking download button and reading file.
     """
 
-    def __init__(self, browser_manager):
+    def __init__(self, browser_manager, host_scheduler=None, session=None, endpoints=None):
         self.browser_manager = browser_manager
+        self.host_scheduler = host_scheduler or HostScheduler()  # shared circuit breaker
+        self.session = session  # replays captured export requests, None always uses the UI
+        self.endpoints = endpoints if endpoints is not None else AirtableEndpointCache()
 
     async def fetch(self, url: str, **kwargs) -> Optional[Any]:
         """
         Fetch CSV content by clicking Airtable's download button.
         """
-        wait_time = 10
+        if not self.host_scheduler.allow(url):
+            log.warning(f"(Airtable Selenium) Host backing off, skipping {url[:75]}...")
+            return None
+
+        # Export request captured on an earlier run, no browser needed
+        direct = self.session is not None and export_mode(kwargs) == 'direct'
+        if direct:
+            csv_content = await self._fetch_direct(url)
+            if csv_content is not None:
+                self.host_scheduler.record_success(url)
+                return csv_content
+
         download_dir = None
         driver = None
         try:
             log.info(f"(Airtable Selenium) Opening browser for: {url[:75]}...")
 
-            download_dir = self._create_download_dir()
+            download_dir = await asyncio.to_thread(self._create_download_dir)
 
             # Open page
-            driver = await self.browser_manager.create_browser(
-                download_dir=download_dir
-            )
-
-            driver.get(url)
+            # the network log is only needed to find the export request for later direct exports
+            driver = await self.browser_manager.lease(download_dir=download_dir, blocked_urls=blocked_urls(kwargs),
+                                                      capture_network=direct)
 
-            # Wait for page to load
-            log.info(f"(Airtable Selenium) Waiting {wait_time} seconds for page load...")
-            await asyncio.sleep(wait_time)
+            # Page load is eager, the menu button wait below covers the rest
+            await self.browser_manager.run(driver.get, url)
 
-            log.info(f"(Airtable Selenium) Page title: {driver.title}")
+            log.info(f"(Airtable Selenium) Page title: {await self.browser_manager.run(lambda: driver.title)}")
 
             # Click through UI to download CSV
-            csv_content = await self._download_csv(driver, download_dir)
+            csv_content = await self._download_csv(driver, download_dir,
+                                                   kwargs.get('download_timeout', DOWNLOAD_TIMEOUT))
+
+            if csv_content is not None and direct:
+                await self._remember_endpoint(driver, url)
 
             # Cleanup
             await self.cleanup(driver, download_dir)
 
+            if csv_content is None:
+                self.host_scheduler.record_failure(url)
+            else:
+                self.host_scheduler.record_success(url)
+
             return csv_content
 
         except Exception as e:
             log.error(f"(Airtable Selenium) Error fetching: {url}: {e}")
             import traceback
             log.error(traceback.format_exc())
-            if driver:
+            self.host_scheduler.record_failure(url)
+            if driver or download_dir:
                 await self.cleanup(driver, download_dir)
             return None
 
-    async def _download_csv(self, driver, download_dir) -> Optional[Any]:
+    async def _fetch_direct(self, url: str) -> Optional[RawContent]:
+        """
+        Replay the cached export request for this view, None (and forget it) if that no longer works.
+        """
+        endpoint = self.endpoints.get(url)
+        if endpoint is None:
+            return None
+
+        try:
+            log.info(f"(Airtable Selenium) Direct export for: {url[:75]}...")
+            await self.host_scheduler.wait(endpoint.url, 0)
+            async with self.session.get(endpoint.url, headers=endpoint.headers) as response:
+                body = await response.read()
+
+                # an expired link answers with an html / json error page
+                if response.status == 200 and body.lstrip()[:1] not in (b'<', b'{', b'['):
+                    return RawContent(body, response.charset or 'utf-8')
+
+                log.warning(f"(Airtable Selenium) Direct export failed ({response.status}), using the UI")
+        except Exception as e:
+            log.warning(f"(Airtable Selenium) Direct export failed ({e}), using the UI")
+
+        try:
+            await asyncio.to_thread(self.endpoints.remove, url)
+        except OSError as e:
+            log.warning(f"(Airtable Selenium) Could not update the endpoint cache: {e}")
+        return None
+
+    async def _remember_endpoint(self, driver, url: str) -> None:
+        """
+        Find the export request in the browser's network log and cache it for this view.
+        """
+        try:
+            entries = await self.browser_manager.run(driver.get_log, 'performance')
+        except Exception as e:
+            log.warning(f"(Airtable Selenium) Network log unavailable: {e}")
+            return
+
+        request = find_csv_request(entries)
+        if request is None:
+            log.info(f"(Airtable Selenium) No export request found for: {url[:75]}...")
+            return
+
+        # the csv is already downloaded, a cache that can't be written must not fail the fetch
+        try:
+            await asyncio.to_thread(self.endpoints.put, url, request)
+        except OSError as e:
+            log.warning(f"(Airtable Selenium) Could not cache export endpoint: {e}")
+            return
+        log.info(f"(Airtable Selenium) Cached export endpoint for: {url[:75]}...")
+
+    async def _download_csv(self, driver, download_dir, timeout: float = DOWNLOAD_TIMEOUT) -> Optional[Any]:
         """
         Click through Airtable UI to download CSV and read content.
 
@@ -189,7 +453,7 @@ class AirtableSeleniumFetcher(ContentFetcher):
                 return None
 
             # Step 3: Wait for file and read content
-            csv_content = await self._wait_and_read_file(download_dir)
+            csv_content = await self._wait_and_read_file(driver, download_dir, timeout)
 
             return csv_content
 
@@ -203,16 +467,21 @@ class AirtableSeleniumFetcher(ContentFetcher):
         """
         Click the 3-dot menu button (More view options).
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         log.info("(Airtable Selenium) Looking for 3-dot menu button...")
         try:
             # Look for menu button in both French and English
-            menu_button = WebDriverWait(driver, 30).until(
+            menu_button = await self.browser_manager.run(
+                WebDriverWait(driver, 30).until,
                 EC.element_to_be_clickable(
                     (By.XPATH, "//div[contains(@class, 'viewMenuButton')]")
                 )
             )
             log.info("(Airtable Selenium) Found menu button! Clicking...")
-            menu_button.click()
+            await self.browser_manager.run(menu_button.click)
 
             # Wait for menu to appear
             log.info("(Airtable Selenium) Waiting 2 seconds for menu to appear...")
@@ -228,18 +497,25 @@ class AirtableSeleniumFetcher(ContentFetcher):
         """
         Click the "Download CSV" button in the menu (single button version).
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         log.info("(Airtable Selenium) Looking for 'Download CSV' button...")
         try:
             # Debug: Show available menu items
-            try:
+            def menu_item_texts():
                 menu_items = driver.find_elements(
                     By.XPATH,
                     "//button[contains(@role, 'menuitem')] | //div[@role='menuitem']"
                 )
-                if menu_items:
-                    log.info(f"(Airtable Selenium) Found {len(menu_items)} menu items")
-                    for i, item in enumerate(menu_items[:15]):
-                        text = item.text.strip()
+                return [item.text.strip() for item in menu_items[:15]], len(menu_items)
+
+            try:
+                texts, count = await self.browser_manager.run(menu_item_texts)
+                if count:
+                    log.info(f"(Airtable Selenium) Found {count} menu items")
+                    for i, text in enumerate(texts):
                         if text:
                             log.info(f"  {i}: {text}")
             except:
@@ -247,17 +523,15 @@ class AirtableSeleniumFetcher(ContentFetcher):
 
             # Find and click "Download CSV" button (French or English)
             # Look for exact text or aria-label
-            download_csv_btn = WebDriverWait(driver, 30).until(
+            download_csv_btn = await self.browser_manager.run(
+                WebDriverWait(driver, 30).until,
                 EC.element_to_be_clickable(
                     (By.XPATH,
                      "//*[contains(text(), 'Download') or contains(text(), 'Télécharger')]")
                 )
             )
             log.info("(Airtable Selenium) Found 'Download' button! Clicking...")
-            download_csv_btn.click()
-
-            # Brief wait after click
-            await asyncio.sleep(10)
+            await self.browser_manager.run(download_csv_btn.click)
 
             return True
 
@@ -265,7 +539,7 @@ class AirtableSeleniumFetcher(ContentFetcher):
             log.error(f"(Airtable Selenium) Failed to click 'Download CSV' button: {e}")
             return False
 
-    async def _wait_and_read_file(self, download_dir) -> Optional[str]:
+    async def _wait_and_read_file(self, driver, download_dir, timeout: float = DOWNLOAD_TIMEOUT) -> Optional[RawContent]:
         """
         Wait for CSV file to be downloaded and read its content.
 
@@ -275,21 +549,18 @@ class AirtableSeleniumFetcher(ContentFetcher):
         log.info(f"(Airtable Selenium) downloading")
         import os
 
-        await asyncio.sleep(30)
-
-        files = os.listdir(download_dir)
-        csv_files = [f for f in files if f.endswith('.csv') and not f.endswith('.crdownload')]
-
-        if csv_files:
-            csv_file = csv_files[0]
-            log.info(f"(Airtable Selenium) SUCCESS! Downloaded: {csv_file}")
+        # Returns as soon as chrome has finished writing the file
+        if self.browser_manager.remote:
+            csv_path = await wait_for_remote_download(driver, download_dir, self.browser_manager.run, '.csv', timeout)
+        else:
+            csv_path = await wait_for_download(download_dir, '.csv', timeout)
 
-            # Read file content
-            csv_path = os.path.join(download_dir, csv_file)
+        if csv_path:
+            log.info(f"(Airtable Selenium) SUCCESS! Downloaded: {os.path.basename(csv_path)}")
 
             try:
-                with open(csv_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                with open(csv_path, 'rb') as f:
+                    content = RawContent(f.read(), 'utf-8')
 
                 # Delete the file
                 os.remove(csv_path)
@@ -301,32 +572,28 @@ class AirtableSeleniumFetcher(ContentFetcher):
                 log.error(f"(Airtable Selenium) Failed to read file: {e}")
                 return None
 
-        log.error(f"(Airtable Selenium) Files in download directory: {files}")
         return None
 
     async def cleanup(self, driver, download_dir) -> None:
         """
         Cleanup driver
         """
-        # Close browser
+        # Give the browser back to the pool
         if driver:
             try:
-                await self.browser_manager.close_browser(driver)
+                await self.browser_manager.release(driver)
             except:
                 pass
 
         if download_dir:
             try:
-                import shutil
-                shutil.rmtree(download_dir, ignore_errors=True)
+                await asyncio.to_thread(self.browser_manager.scratch.remove, download_dir)
                 log.info(f"(Airtable Fetcher) Cleaned up download directory")
             except Exception as e:
                 log.warning(f"Failed to remove {download_dir}: {e}")
 
     def _create_download_dir(self) -> str:
-        """Create and return download directory path"""
-        import tempfile
-        import time
-        download_dir = tempfile.mkdtemp(prefix=f'downloads_{int(time.time() * 1000)}_')
+        """Create and return download directory path (in the browsers' scratch space)"""
+        download_dir = self.browser_manager.scratch.create(f'downloads_{int(time.time() * 1000)}_')
         log.info(f"(Airtable Fetcher) Download directory: {download_dir}")
         return download_dir
\ No newline at end of file
@@ -0,0 +1,53 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import Optional, Any, Iterable, Tuple
+
+from interfaces.content import RawContent
+
+'''
+raw content fingerprints
+
+hashing the fetched bytes is far cheaper than parsing them, so an unchanged
+page can skip extraction entirely. regions that change on every request
+without the listings changing (csrf tokens, nonces, render timestamps) are
+blanked out before hashing. sites can add their own patterns with `volatile`.
+'''
+
+DEFAULT_VOLATILE = (
+    r'(?i)<(?:meta|input)\b[^>]*(?:csrf|xsrf|authenticity_token)[^>]*>',  # csrf meta/hidden inputs
+    r'(?i)"(?:csrf|xsrf)[-_]?token"\s*:\s*"[^"]*"',  # csrf tokens in inline json
+    r'(?i)\bnonce=["\'][^"\']*["\']',  # script/style nonces
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?',  # render timestamps
+)
+
+
+@lru_cache(maxsize=64)
+def _compile(patterns: Tuple[str, ...], as_bytes: bool):
+    return [re.compile(pattern.encode() if as_bytes else pattern) for pattern in patterns]
+
+
+def content_fingerprint(content: Any, volatile: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    Hash of fetched content with volatile regions removed.
+
+    Returns None for content that is not text or bytes (e.g. a live browser).
+    """
+    if isinstance(content, RawContent):
+        content = content.body
+
+    if isinstance(content, str):
+        data, as_bytes = content, False
+    elif isinstance(content, (bytes, bytearray)):
+        data, as_bytes = bytes(content), True
+    else:
+        return None
+
+    patterns = DEFAULT_VOLATILE + tuple(volatile or ())
+    for pattern in _compile(patterns, as_bytes):
+        data = pattern.sub(b'' if as_bytes else '', data)
+
+    if not as_bytes:
+        data = data.encode('utf-8', errors='surrogatepass')
+
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
@@ -1,5 +1,5 @@
 from interfaces.data import DataProcessor
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 import pandas as pd
 
 class ProcessingPipeline:
@@ -17,4 +17,41 @@ class ProcessingPipeline:
                 df = await processor.process(df, config)
                 if df.empty:
                     break  # Short circuit if no data left
-        return df
\ No newline at end of file
+        return df
+
+    async def execute_stream(
+            self,
+            chunks: AsyncIterator[pd.DataFrame],
+            config: Dict[str, Any],
+            parser_type: str
+    ) -> pd.DataFrame:
+        """
+        Run processors over a stream of chunks.
+
+        Leading streamable processors run on each chunk as it arrives, so only
+        the rows that survive them are kept. The remaining processors run once
+        on the joined result.
+        """
+        processors = [processor for processor in self.processors if processor.applies_to(parser_type)]
+        split = next((i for i, processor in enumerate(processors) if not processor.streamable), len(processors))
+        per_chunk, whole = processors[:split], processors[split:]
+
+        kept = []
+        async for df in chunks:
+            for processor in per_chunk:
+                df = await processor.process(df, config)
+                if df.empty:
+                    break
+
+            if not df.empty:
+                kept.append(df)
+
+        if not kept:
+            return pd.DataFrame()
+
+        df = pd.concat(kept, ignore_index=True)
+        for processor in whole:
+            df = await processor.process(df, config)
+            if df.empty:
+                break
+        return df
@@ -0,0 +1,107 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, List
+
+'''
+per-site stage timings
+
+timings are only recorded while a StageTimings is active for the
+current task (see measure), so the normal crawl loop pays nothing.
+nested stages are exclusive, e.g. "fetch" does not include "robots".
+'''
+
+STAGES = ['robots', 'fetch', 'extract', 'pipeline', 'publish']
+
+_current: ContextVar[Optional['StageTimings']] = ContextVar('stage_timings', default=None)
+
+
+class StageTimings:
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.rows: Dict[str, int] = {}
+        self.total = 0.0
+        self.error: Optional[str] = None
+        self._children: List[float] = []  # time spent in nested stages, per open stage
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def measure():
+    """
+    Record stage timings for everything run in the current task.
+    """
+    timings = StageTimings()
+    token = _current.set(timings)
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings.total = time.perf_counter() - start
+        _current.reset(token)
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Time a stage if timings are being measured.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    timings._children.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = timings._children.pop()
+        timings.add(stage, elapsed - nested)
+        if timings._children:
+            timings._children[-1] += elapsed
+
+
+def record_rows(name: str, count: int):
+    """
+    Record a row count if timings are being measured.
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.rows[name] = timings.rows.get(name, 0) + count
+
+
+def format_report(results: Dict[str, StageTimings]) -> str:
+    """
+    Render per-site timings as a plain text table.
+    """
+    name_width = max([len('site')] + [len(name) for name in results])
+    header = f"{'site':<{name_width}} " + " ".join(f"{stage:>9}" for stage in STAGES + ['total']) \
+        + f" {'rows':>6} {'published':>9}"
+
+    lines = [header, '-' * len(header)]
+    totals = StageTimings()
+
+    for name, timings in results.items():
+        for stage, seconds in timings.stages.items():
+            totals.add(stage, seconds)
+        totals.total += timings.total
+
+        line = f"{name:<{name_width}} " \
+            + " ".join(f"{timings.stages.get(stage, 0.0):>8.2f}s" for stage in STAGES) \
+            + f" {timings.total:>8.2f}s" \
+            + f" {timings.rows.get('extracted', 0):>6} {timings.rows.get('published', 0):>9}"
+        if timings.error:
+            line += f"  error: {timings.error}"
+        lines.append(line)
+
+    lines.append('-' * len(header))
+    lines.append(
+        f"{'sum':<{name_width}} "
+        + " ".join(f"{totals.stages.get(stage, 0.0):>8.2f}s" for stage in STAGES)
+        + f" {totals.total:>8.2f}s"
+    )
+    return "\n".join(lines)
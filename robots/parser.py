@@ -62,6 +62,11 @@ class RobotsTxtParser(RobotsParser):
 
         crawl_delay = robot_parser.crawl_delay(user_agent) or 1.0
 
+        # Request-rate: n requests per m seconds is the same as m/n seconds between requests
+        request_rate = robot_parser.request_rate(user_agent)
+        if request_rate and request_rate.requests:
+            crawl_delay = max(float(crawl_delay), request_rate.seconds / request_rate.requests)
+
         return RobotsRules(
             can_fetch=can_fetch,
             crawl_delay=float(crawl_delay),
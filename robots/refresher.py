@@ -96,7 +96,7 @@ _refresh_instance = None
 async def cleanup():
     """Cleanup on shutdown"""
     if _refresh_instance:
-        await _refresh_instance.stop()
+        _refresh_instance.stop()
 
         try:
             await _refresh_instance._task
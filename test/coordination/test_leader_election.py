@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from coordination.leader import LeaderElection
+from coordination.memory import InMemoryLeaseStore
+from coordination.sqlite import SqliteLeaseStore
+
+
+@pytest.fixture
+def lease_store(tmp_path):
+    return SqliteLeaseStore(str(tmp_path / "coordination.db"))
+
+
+@pytest.mark.asyncio
+async def test_single_leader(lease_store):
+    """test that only one replica becomes leader"""
+    a = LeaderElection(lease_store, "maintenance", "node-a", lease_seconds=0.6)
+    b = LeaderElection(lease_store, "maintenance", "node-b", lease_seconds=0.6)
+    a.start()
+    await asyncio.sleep(0.05)
+    b.start()
+    await asyncio.sleep(0.5)
+
+    assert a.is_leader is True
+    assert b.is_leader is False
+
+    await a.stop()
+    await b.stop()
+
+
+@pytest.mark.asyncio
+async def test_failover_when_leader_dies(lease_store):
+    """test that another replica takes over once the leader stops renewing"""
+    a = LeaderElection(lease_store, "maintenance", "node-a", lease_seconds=0.6)
+    b = LeaderElection(lease_store, "maintenance", "node-b", lease_seconds=0.6)
+    a.start()
+    await asyncio.sleep(0.05)
+    b.start()
+    await asyncio.sleep(0.1)
+    assert a.is_leader and not b.is_leader
+
+    # simulate a crash: the task dies without releasing the lease
+    a._task.cancel()
+    await asyncio.sleep(1.0)
+
+    assert b.is_leader is True, "Lease should fail over after it expires"
+    await b.stop()
+
+
+@pytest.mark.asyncio
+async def test_release_on_stop(lease_store):
+    """test that stopping hands the lease over straight away"""
+    a = LeaderElection(lease_store, "maintenance", "node-a", lease_seconds=60)
+    a.start()
+    await asyncio.sleep(0.05)
+    await a.stop()
+
+    assert await lease_store.acquire("maintenance", "node-b", 60) is True
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_is_leader():
+    """test that a single process is always leader with the default store"""
+    election = LeaderElection(InMemoryLeaseStore(), "maintenance", "node-a")
+    election.start()
+    await asyncio.sleep(0.05)
+
+    assert election.is_leader is True
+    await election.stop()
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from coordination.sqlite import SqliteCrawlQueue, SqliteSeenStore
+from processing.data_processor import SeenPostingProcessor
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "coordination.db")
+
+
+@pytest.mark.asyncio
+async def test_lease_is_exclusive(db_path):
+    """test that a leased job is not handed to a second worker"""
+    queue = SqliteCrawlQueue(db_path)
+    await queue.add("site", {"url": "http://localhost:8080/static"})
+
+    job = await queue.lease("node-a", 60)
+    assert job is not None
+    assert job.config["url"] == "http://localhost:8080/static"
+
+    assert await queue.lease("node-b", 60) is None, "Leased job should not be handed out twice"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_leases(db_path):
+    """test that concurrent workers never lease the same job"""
+    queue = SqliteCrawlQueue(db_path)
+    for i in range(5):
+        await queue.add(f"site-{i}", {"url": f"http://localhost:8080/{i}"})
+
+    jobs = await asyncio.gather(*[queue.lease(f"node-{i}", 60) for i in range(10)])
+    leased = [job.job_id for job in jobs if job is not None]
+
+    assert len(leased) == 5
+    assert len(set(leased)) == 5, "Each job should be leased exactly once"
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_fails_over(db_path):
+    """test that a job is re-leased once its owner stops renewing"""
+    queue = SqliteCrawlQueue(db_path)
+    await queue.add("site", {"url": "http://localhost:8080/static"})
+
+    await queue.lease("node-a", 0.1)
+    await asyncio.sleep(0.2)
+
+    job = await queue.lease("node-b", 60)
+    assert job is not None and job.owner == "node-b"
+    assert await queue.renew("site", "node-a", 60) is False, "Old owner should have lost the lease"
+
+
+@pytest.mark.asyncio
+async def test_complete_reschedules(db_path):
+    """test that completing a job schedules its next run"""
+    queue = SqliteCrawlQueue(db_path)
+    await queue.add("site", {"url": "http://localhost:8080/static"})
+
+    job = await queue.lease("node-a", 60)
+    await queue.complete(job.job_id, "node-a", time.time() + 60)
+    assert await queue.lease("node-a", 60) is None, "Job should not be due yet"
+
+    # re-adding on restart keeps the schedule
+    await queue.add("site", {"url": "http://localhost:8080/static"})
+    assert await queue.lease("node-a", 60) is None
+
+
+@pytest.mark.asyncio
+async def test_seen_store_shared(db_path):
+    """test that keys seen through one store are filtered by another"""
+    store_a = SqliteSeenStore(db_path)
+    store_b = SqliteSeenStore(db_path)
+
+    assert await store_a.add_new(["a", "b"]) == {"a", "b"}
+    assert await store_b.add_new(["b", "c"]) == {"c"}
+
+
+@pytest.mark.asyncio
+async def test_seen_processor_without_key_columns(db_path):
+    """test that rows without any key column are told apart by their content"""
+    processor = SeenPostingProcessor(SqliteSeenStore(db_path))
+
+    first = await processor.process(pd.DataFrame({"title": ["a", "b"]}), {})
+    assert first["title"].tolist() == ["a", "b"]
+
+    second = await processor.process(pd.DataFrame({"title": ["b", "c"]}), {})
+    assert second["title"].tolist() == ["c"]
+
+
+@pytest.mark.asyncio
+async def test_retain_drops_removed_sites(db_path):
+    """test that jobs of sites no longer in the config are not leased again"""
+    queue = SqliteCrawlQueue(db_path)
+    await queue.add("kept", {"url": "http://localhost:8080/kept"})
+    await queue.add("removed", {"url": "http://localhost:8080/removed"})
+
+    await queue.retain(["kept"])
+
+    job = await queue.lease("node-a", 60)
+    assert job.job_id == "kept"
+    assert await queue.lease("node-b", 60) is None
+
+
+@pytest.mark.asyncio
+async def test_seen_store_forgets_old_keys(db_path):
+    """test that keys older than the retention are pruned"""
+    store = SqliteSeenStore(db_path, retention=0.1)
+    assert await store.add_new(["a"]) == {"a"}
+
+    await asyncio.sleep(0.2)
+    assert await store.add_new(["b"]) == {"b"}
+    assert await store.add_new(["a"]) == {"a"}, "Expired key should count as new"
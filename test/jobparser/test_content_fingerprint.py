@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+import pytest
+
+from interfaces.content import ContentFetcher
+from parsers.base_parser import ParserDependencies
+from parsers.parser_types import StaticContentParser
+from processing.fingerprint import content_fingerprint
+from processing.pipeline import ProcessingPipeline
+from processing.tracker import Tracker
+
+PAGE = """<html><head><meta name="csrf-token" content="{token}"></head>
+<body><div class="company">Acme</div><div class="position">Engineer</div></body></html>"""
+
+config = {
+    'url': "http://localhost:8080/static",
+    'date_format': '%Y-%m-%d',
+    'selectors': {'company_name': "div.company", 'position': "div.position"}
+}
+
+
+class StubFetcher(ContentFetcher):
+    def __init__(self, pages):
+        self.pages = iter(pages)
+
+    async def fetch(self, url: str, **kwargs):
+        return next(self.pages)
+
+
+def test_volatile_regions_ignored():
+    """test that csrf tokens and configured regions do not change the fingerprint"""
+    assert content_fingerprint(PAGE.format(token="a")) == content_fingerprint(PAGE.format(token="b"))
+    assert content_fingerprint(PAGE.format(token="a").encode()) == content_fingerprint(PAGE.format(token="b").encode())
+
+    assert content_fingerprint("build 1", ["build \\d+"]) == content_fingerprint("build 2", ["build \\d+"])
+    assert content_fingerprint("Acme") != content_fingerprint("Acme Inc")
+
+
+def test_non_text_content_not_fingerprinted():
+    """test that live browser content is never fingerprinted"""
+    assert content_fingerprint(object()) is None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_content_skips_extraction():
+    """test that identical content skips extraction on the next parse"""
+    pages = [PAGE.format(token="a"), PAGE.format(token="b"), PAGE.format(token="c").replace("Acme", "Globex")]
+    deps = ParserDependencies(StubFetcher(pages), ProcessingPipeline([]), Tracker(), Tracker())
+    parser = StaticContentParser(deps)
+
+    assert await parser.parse(config) is not None
+
+    with patch.object(StaticContentParser, '_extract_data', wraps=parser._extract_data) as extract:
+        assert await parser.parse(config) is None
+        extract.assert_not_called()
+
+        result = await parser.parse(config)
+        extract.assert_called_once()
+
+    assert result.company_name == ["Globex"]
+
+
+@pytest.mark.asyncio
+async def test_entries_on_same_url_fingerprinted_separately():
+    """test that one entry's fingerprint never skips another entry on the same url"""
+    deps = ParserDependencies(StubFetcher([PAGE.format(token="a")] * 4), ProcessingPipeline([]), Tracker(), Tracker())
+    parser = StaticContentParser(deps)
+    companies = {**config, 'name': 'companies'}
+    positions = {**config, 'name': 'positions', 'selectors': {'company_name': "div.position", 'position': "div.position"}}
+
+    assert (await parser.parse(companies)).company_name == ["Acme"]
+    assert (await parser.parse(positions)).company_name == ["Engineer"]
+
+    # unnamed entries are told apart by their selectors
+    del companies['name'], positions['name']
+    assert await parser.parse(companies) is not None
+    assert await parser.parse(positions) is not None
@@ -0,0 +1,136 @@
+import threading
+from datetime import date
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from io import BytesIO
+
+import aiohttp
+import pandas as pd
+import pytest
+
+from interfaces.content import ContentFetcher, ContentStream
+from parsers.base_parser import ParserDependencies
+from parsers.csv_stream import CsvChunker
+from parsers.factory import ParserFactory
+from parsers.parser_types import StaticContentParser
+from processing.pipeline import ProcessingPipeline
+from processing.tracker import Tracker
+from WebsiteManager import verify
+
+ROWS = 2000
+
+
+def build_csv() -> str:
+    today = date.today().isoformat()
+    lines = ["company_name,position,domain,description,date"]
+    for i in range(ROWS):
+        day = today if i % 2 == 0 else "2000-01-01"
+        lines.append(f'Company {i},Engineer {i},company{i}.com,"line one\nline ""two"", {i}",{day}')
+    return "\n".join(lines) + "\n"
+
+
+CSV = build_csv()
+
+
+class UserAgentStub:
+    random = "TestBot/1.0"
+
+
+class CsvHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = CSV.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', 'text/csv; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        for i in range(0, len(body), 4096):
+            self.wfile.write(body[i:i + 4096])
+
+
+@pytest.fixture
+def test_server():
+    server = HTTPServer(('localhost', 0), CsvHandler)  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=2)
+
+
+def test_chunker_keeps_quoted_newlines():
+    """test that blocks only end on newlines outside quotes, whatever the feed sizes"""
+    data = CSV.encode('utf-8')
+    chunker = CsvChunker(block_size=1000)
+
+    blocks = []
+    for i in range(0, len(data), 333):
+        blocks.extend(chunker.feed(data[i:i + 333]))
+    blocks.append(chunker.flush())
+
+    assert len(blocks) > 10
+    frames = [pd.read_csv(BytesIO(block)) for block in blocks]
+    df = pd.concat(frames, ignore_index=True)
+
+    assert len(df) == ROWS
+    assert df['description'].iloc[5] == 'line one\nline "two", 5'
+
+
+@pytest.mark.asyncio
+async def test_stream_matches_buffered_parse(test_server):
+    """test that streamed parsing returns the same rows as the buffered path"""
+    config = {
+        'url': f"{test_server}/csv",
+        'date_format': '%Y-%m-%d',
+        'selectors': {
+            'company_name': 'company_name',
+            'position': 'position',
+            'application_link': 'domain',
+            'description': 'description',
+            'date': 'date'
+        }
+    }
+
+    async with aiohttp.ClientSession() as session:
+        buffered = await ParserFactory(session, tracker=Tracker(), user_agent_provider=UserAgentStub()) \
+            .create_download_parser().parse(config)
+        streamed = await ParserFactory(session, tracker=Tracker(), user_agent_provider=UserAgentStub()) \
+            .create_download_parser().parse({**config, 'stream': True})
+
+    assert len(streamed.company_name) == ROWS // 2
+    assert streamed.company_name == buffered.company_name
+    assert streamed.description == buffered.description
+
+
+def test_stream_rejected_for_non_download_parsers():
+    """test that verify() refuses `stream` on parser types that cannot stream"""
+    site = {'url': "http://board.example/jobs", 'base_url': "http://board.example", 'date_format': '%Y-%m-%d',
+            'accept': 'text/csv', 'selectors': {'company_name': "div.company"}, 'stream': True}
+
+    verify({'csv': {**site, 'parser_type': 'DOWNLOAD'}})
+    with pytest.raises(SystemExit):
+        verify({'page': {**site, 'parser_type': 'STATIC'}})
+
+
+@pytest.mark.asyncio
+async def test_non_streaming_parser_closes_stream():
+    """test that a parser without stream support closes a stream it is handed instead of parsing it"""
+    class StreamStub(ContentStream):
+        closed = False
+
+        async def __aiter__(self):
+            yield b"company_name\nAcme\n"
+
+        async def aclose(self):
+            StreamStub.closed = True
+
+    class StreamFetcher(ContentFetcher):
+        async def fetch(self, url, **kwargs):
+            return StreamStub()
+
+    parser = StaticContentParser(ParserDependencies(StreamFetcher(), ProcessingPipeline([]), Tracker()))
+
+    assert await parser.parse({'url': "http://board.example/jobs", 'selectors': {'company_name': "div"}}) is None
+    assert StreamStub.closed
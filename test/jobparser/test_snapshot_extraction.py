@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+from interfaces.content import RawContent
+from parsers.base_parser import ParserDependencies
+from parsers.parser_types import StaticContentParser, JavaScriptContentParser
+from processing.pipeline import ProcessingPipeline
+from processing.tracker import Tracker
+
+PAGE = Path(__file__).parent / 'data' / 'test.html'  # stands in for the rendered DOM
+
+selectors = {
+    'company_name': "div.flex-auto.line-height-4",
+    'position': "div.flex-auto.line-height-4 div.truncate",
+    'application_link': "div.domain-class",
+    'description': "div.description-class",
+    'date': "div.date-class"
+}
+
+
+def dependencies():
+    return ParserDependencies(None, ProcessingPipeline([]), Tracker())
+
+
+@pytest.mark.asyncio
+async def test_snapshot_matches_static_engine():
+    """test that a rendered snapshot is extracted exactly like a STATIC page"""
+    content = RawContent(PAGE.read_bytes(), 'utf-8')
+
+    static = await StaticContentParser(dependencies())._extract_data(content, selectors)
+    snapshot = await JavaScriptContentParser(dependencies())._extract_data(content, selectors)
+
+    assert snapshot == static
+    assert snapshot['company_name']
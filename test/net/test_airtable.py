@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import aiohttp
+import pytest
+
+from interfaces.content import RawContent
+from net.airtable import AirtableEndpointCache, CapturedRequest, export_mode, find_csv_request
+from net.scratch import ScratchSpace
+from processing.fetchers import AirtableSeleniumFetcher
+
+VIEW = "https://airtable.com/appXXXX/shrXXXX/tblXXXX"
+CSV = "company_name,position\nAcme,Engineer\n"
+
+
+def log_entry(method, **params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+def test_finds_csv_request():
+    """test that the request whose response was a csv is picked from the network log"""
+    entries = [
+        log_entry('Network.requestWillBeSent', requestId='1',
+                  request={'url': 'https://airtable.com/v0.3/view/viwX/readSharedViewData', 'method': 'GET',
+                           'headers': {'x-airtable-application-id': 'appXXXX'}}),
+        log_entry('Network.requestWillBeSent', requestId='2',
+                  request={'url': 'https://airtable.com/v0.3/view/viwX/downloadCsv?accessPolicy=abc', 'method': 'GET',
+                           'headers': {'x-airtable-application-id': 'appXXXX', 'Cookie': 'session=1'}}),
+        log_entry('Network.responseReceived', requestId='2', response={'mimeType': 'text/csv', 'headers': {}}),
+    ]
+
+    assert find_csv_request(entries) == CapturedRequest(
+        'https://airtable.com/v0.3/view/viwX/downloadCsv?accessPolicy=abc', 'GET',
+        {'x-airtable-application-id': 'appXXXX'}  # session cookie is not kept
+    )
+    assert find_csv_request(entries[:1]) is None
+
+
+def test_cache_persists(tmp_path):
+    """test that captured requests survive a restart"""
+    path = str(tmp_path / 'cache' / 'endpoints.json')
+    request = CapturedRequest('https://airtable.com/downloadCsv', 'GET', {'x-time-zone': 'UTC'})
+
+    AirtableEndpointCache(path).put(VIEW, request)
+    assert AirtableEndpointCache(path).get(VIEW) == request
+    assert os.stat(path).st_mode & 0o777 == 0o600  # captured headers may hold tokens
+
+    AirtableEndpointCache(path).remove(VIEW)
+    assert AirtableEndpointCache(path).get(VIEW) is None
+
+
+def test_cache_path_read_when_built(tmp_path, monkeypatch):
+    """test that AIRTABLE_ENDPOINTS_FILE is read when the cache is built, after .env was loaded"""
+    path = str(tmp_path / 'endpoints.json')
+    monkeypatch.setenv('AIRTABLE_ENDPOINTS_FILE', path)
+
+    assert AirtableEndpointCache().path == path
+
+
+def test_export_mode_validated():
+    """test that only the known export modes are accepted"""
+    assert export_mode({}) == 'direct'
+    assert export_mode({'export': 'ui'}) == 'ui'
+    with pytest.raises(ValueError):
+        export_mode({'export': 'UI'})
+
+
+class ExportHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith('/downloadCsv'):
+            self.send_response(200)
+            self.send_header('Content-type', 'text/csv')
+            self.end_headers()
+            self.wfile.write(CSV.encode('utf-8'))
+        else:  # expired link
+            self.send_response(200)
+            self.send_header('Content-type', 'text/html')
+            self.end_headers()
+            self.wfile.write(b"<html>Access policy expired</html>")
+
+
+@pytest.fixture
+def test_server():
+    server = HTTPServer(('localhost', 0), ExportHandler)  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=2)
+
+
+@pytest.mark.asyncio
+async def test_direct_export(test_server, tmp_path):
+    """test that a cached request is replayed without a browser, and dropped once it stops working"""
+    endpoints = AirtableEndpointCache(str(tmp_path / 'endpoints.json'))
+    endpoints.put(VIEW, CapturedRequest(f"{test_server}/downloadCsv?accessPolicy=abc", 'GET', {}))
+    endpoints.put("other-view", CapturedRequest(f"{test_server}/expired", 'GET', {}))
+
+    async with aiohttp.ClientSession() as session:
+        fetcher = AirtableSeleniumFetcher(None, session=session, endpoints=endpoints)
+
+        assert await fetcher._fetch_direct(VIEW) == RawContent(CSV.encode('utf-8'), 'utf-8')
+        assert await fetcher._fetch_direct("other-view") is None
+
+    assert endpoints.get(VIEW) is not None
+    assert endpoints.get("other-view") is None
+
+
+CSV_LOG = [
+    log_entry('Network.requestWillBeSent', requestId='1',
+              request={'url': 'https://airtable.com/v0.3/view/viwX/downloadCsv?accessPolicy=abc', 'method': 'GET',
+                       'headers': {}}),
+    log_entry('Network.responseReceived', requestId='1', response={'mimeType': 'text/csv', 'headers': {}}),
+]
+
+
+class DriverDouble:
+    title = "Airtable"
+
+    def get(self, url):
+        pass
+
+    def get_log(self, log_type):
+        return CSV_LOG
+
+
+class BrowserManagerDouble:
+    def __init__(self, scratch):
+        self.scratch = scratch
+        self.leases = []
+
+    async def lease(self, **kwargs):
+        self.leases.append(kwargs)
+        return DriverDouble()
+
+    async def run(self, func, *args):
+        return func(*args)
+
+    async def release(self, driver):
+        pass
+
+
+class UnwritableCache(AirtableEndpointCache):
+    def _save(self):
+        raise PermissionError(13, "Permission denied", self.path)
+
+
+async def fetch_through_ui(tmp_path, endpoints, **config):
+    browser_manager = BrowserManagerDouble(ScratchSpace(str(tmp_path / 'scratch')))
+
+    async with aiohttp.ClientSession() as session:
+        fetcher = AirtableSeleniumFetcher(browser_manager, session=session, endpoints=endpoints)
+
+        async def download_csv(driver, download_dir, timeout):
+            return CSV
+
+        fetcher._download_csv = download_csv
+        content = await fetcher.fetch(VIEW, **config)
+
+    return content, fetcher, browser_manager
+
+
+@pytest.mark.asyncio
+async def test_unwritable_cache_keeps_download(tmp_path):
+    """test that a cache that can't be written doesn't fail a finished download"""
+    content, fetcher, _ = await fetch_through_ui(tmp_path, UnwritableCache(str(tmp_path / 'endpoints.json')))
+
+    assert content == CSV
+    assert fetcher.host_scheduler.state(VIEW).failures == 0
+
+
+@pytest.mark.asyncio
+async def test_ui_export_captures_nothing(tmp_path):
+    """test that export: ui neither logs network events nor caches the export request"""
+    endpoints = AirtableEndpointCache(str(tmp_path / 'endpoints.json'))
+
+    content, _, browser_manager = await fetch_through_ui(tmp_path, endpoints, export='ui')
+    assert content == CSV
+    assert browser_manager.leases[-1]['capture_network'] is False
+    assert endpoints.get(VIEW) is None
+
+    _, _, browser_manager = await fetch_through_ui(tmp_path, endpoints)  # export: direct
+    assert browser_manager.leases[-1]['capture_network'] is True
+    assert endpoints.get(VIEW) is not None
@@ -0,0 +1,218 @@
+import asyncio
+import os
+
+import pytest
+
+from net.browser_manager import BrowserManager, PooledBrowser
+from net.scratch import ScratchSpace
+
+
+class DriverDouble:
+    """Just enough of a WebDriver for the pool bookkeeping"""
+
+    def __init__(self):
+        self.crashed = False
+        self.quit_called = False
+        self.cdp_commands = []
+        self.cdp_args = []
+        self.downloads_deleted = False
+        self.switch_to = self
+
+    @property
+    def window_handles(self):
+        if self.crashed:
+            raise ConnectionError("chrome not reachable")
+        return ["tab"]
+
+    def window(self, handle):
+        pass
+
+    def get(self, url):
+        pass
+
+    def execute_cdp_cmd(self, cmd, args):
+        self.cdp_commands.append(cmd)
+        self.cdp_args.append(args)
+
+    def get_log(self, log_type):
+        return []
+
+    def delete_downloadable_files(self):
+        self.downloads_deleted = True
+
+    def quit(self):
+        self.quit_called = True
+
+
+class PoolUnderTest(BrowserManager):
+    launched = 0
+
+    async def _launch(self, headless: bool = True, capture_network: bool = False) -> PooledBrowser:
+        PoolUnderTest.launched += 1
+        browser = PooledBrowser(DriverDouble(), "/nonexistent", capture_network)
+        self._browsers[str(id(browser.driver))] = browser
+        return browser
+
+    @staticmethod
+    def _rss_mb(driver) -> float:
+        return 0.0
+
+
+@pytest.fixture
+def pool(tmp_path):
+    PoolUnderTest._instance = None
+    PoolUnderTest.launched = 0
+    BrowserManager._initialized = False
+    yield PoolUnderTest(pool_size=2, max_pages=3, max_rss_mb=1024, scratch=ScratchSpace(str(tmp_path)))
+    BrowserManager._initialized = False
+
+
+@pytest.mark.asyncio
+async def test_released_browser_is_reused(pool):
+    """test that a released browser serves the next lease instead of a new launch"""
+    driver = await pool.lease()
+    await pool.release(driver)
+
+    assert await pool.lease() is driver
+    assert PoolUnderTest.launched == 1
+
+
+@pytest.mark.asyncio
+async def test_recycled_after_max_pages(pool):
+    """test that a browser is quit after max_pages pages"""
+    driver = await pool.lease()
+    for _ in range(2):
+        await pool.release(driver)
+        assert await pool.lease() is driver
+    await pool.release(driver)
+
+    assert driver.quit_called
+    assert await pool.lease() is not driver
+
+
+@pytest.mark.asyncio
+async def test_crashed_browser_discarded(pool):
+    """test that an idle browser that crashed is not handed out"""
+    driver = await pool.lease()
+    await pool.release(driver)
+    driver.crashed = True
+
+    assert await pool.lease() is not driver
+    assert driver.quit_called
+
+
+@pytest.mark.asyncio
+async def test_pool_size_limits_leases(pool):
+    """test that leases wait once pool_size browsers are out"""
+    first, second = await pool.lease(), await pool.lease()
+
+    waiting = asyncio.create_task(pool.lease())
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    await pool.release(first)
+    assert await asyncio.wait_for(waiting, 1) is first
+    await pool.release(first)
+    await pool.release(first)  # double release is ignored
+    await pool.release(second)
+    assert pool._slots._value == 2
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_leave_event_loop_free(pool):
+    """test that a slow webdriver call does not stall other coroutines"""
+    import time
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    await pool.run(time.sleep, 0.2)
+    task.cancel()
+
+    assert ticks > 5
+
+
+@pytest.mark.asyncio
+async def test_remote_browsers_keep_pool_semantics(pool):
+    """test that grid browsers are reused the same way, with downloads left to the node"""
+    pool.remote_url = "http://selenium-hub:4444"
+
+    driver = await pool.lease(download_dir="/local/dir")
+    assert "Browser.setDownloadBehavior" not in driver.cdp_commands
+    await pool.release(driver)
+
+    assert driver.downloads_deleted
+    assert await pool.lease() is driver
+    assert PoolUnderTest.launched == 1
+
+
+@pytest.mark.asyncio
+async def test_user_agent_overridden_for_lease(pool):
+    """test that the leased browser sends the given agent and the override is cleared on release"""
+    driver = await pool.lease(user_agent="Mozilla/5.0 Test")
+    assert ("Network.setUserAgentOverride", {"userAgent": "Mozilla/5.0 Test"}) in zip(driver.cdp_commands, driver.cdp_args)
+
+    await pool.release(driver)
+    assert (driver.cdp_commands[-1], driver.cdp_args[-1]) == ("Network.setUserAgentOverride", {"userAgent": ""})
+
+
+@pytest.mark.asyncio
+async def test_network_capture_only_when_asked(pool):
+    """test that plain leases never get a network-logging browser and the pool stays within its size"""
+    plain = await pool.lease()
+    await pool.release(plain)
+
+    capturing = await pool.lease(capture_network=True)
+    assert capturing is not plain
+    await pool.release(capturing)
+
+    assert await pool.lease() is plain
+    await pool.release(plain)
+    assert await pool.lease(capture_network=True) is capturing
+    await pool.release(capturing)
+
+    # two plain leases with a capturing browser idle: it is quit to stay within pool_size
+    first, second = await pool.lease(), await pool.lease()
+    assert first is plain and second is not capturing
+    assert capturing.quit_called
+    assert len(pool._browsers) == 2
+
+
+@pytest.mark.asyncio
+async def test_no_reaper_for_grid_browsers(tmp_path):
+    """test that launching grid sessions does not start the local process reaper"""
+    BrowserManager._instance = None
+    BrowserManager._initialized = False
+    try:
+        grid = BrowserManager(pool_size=1, scratch=ScratchSpace(str(tmp_path)), remote_url="http://selenium-hub:4444")
+        grid._start_chrome = lambda options: DriverDouble()
+
+        browser = await grid._launch()
+        assert browser.user_data_dir is None
+        assert grid.reaper._task is None
+    finally:
+        BrowserManager._instance = None
+        BrowserManager._initialized = False
+
+
+@pytest.mark.asyncio
+async def test_trim_scratch_recycles_largest_idle_profile(pool):
+    """test that an over-quota scratch space quits the idle browser with the largest profile"""
+    small, large = await pool.lease(), await pool.lease()
+    for driver, size in ((small, 10), (large, 2 ** 20)):
+        browser = pool._browsers[str(id(driver))]
+        browser.user_data_dir = pool.scratch.create('browser_')
+        with open(os.path.join(browser.user_data_dir, 'data'), 'wb') as file:
+            file.write(b'x' * size)
+        await pool.release(driver)
+
+    pool.scratch.quota_bytes = 2 ** 19
+    assert await pool.trim_scratch() == 2 ** 20
+
+    assert large.quit_called and not small.quit_called
+    assert await pool.trim_scratch() == 0
@@ -0,0 +1,102 @@
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from interfaces.content import NOT_MODIFIED
+from net.conditional import ValidatorCache
+from parsers.factory import ParserFactory
+from parsers.parser_types import DownloadParser
+from processing.fetchers import DownloadFetcher
+from processing.tracker import Tracker
+
+CSV = "company_name,position,domain,description,date\nAcme,Engineer,acme.com,desc,2000-01-01\n"
+ETAG = '"v1"'
+
+
+class UserAgentStub:
+    random = "TestBot/1.0"
+
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    full_responses = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        ConditionalHandler.full_responses += 1
+        self.send_response(200)
+        self.send_header('Content-type', 'text/csv')
+        self.send_header('ETag', ETAG)
+        self.send_header('Last-Modified', 'Wed, 01 Jan 2025 00:00:00 GMT')
+        self.end_headers()
+        self.wfile.write(CSV.encode('utf-8'))
+
+
+@pytest.fixture
+def test_server():
+    ConditionalHandler.full_responses = 0
+    server = HTTPServer(('localhost', 0), ConditionalHandler)  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=2)
+
+
+@pytest.mark.asyncio
+async def test_second_fetch_not_modified(test_server):
+    """test that stored validators turn the second fetch into a 304"""
+    validators = ValidatorCache()
+    async with aiohttp.ClientSession() as session:
+        fetcher = DownloadFetcher(session, UserAgentStub(), validators)
+
+        assert await fetcher.fetch(f"{test_server}/csv") == CSV
+        assert validators.headers(f"{test_server}/csv") == {
+            "If-None-Match": ETAG,
+            "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"
+        }
+
+        assert await fetcher.fetch(f"{test_server}/csv") is NOT_MODIFIED
+        assert ConditionalHandler.full_responses == 1
+
+
+@pytest.mark.asyncio
+async def test_not_modified_skips_extraction(test_server):
+    """test that a 304 short-circuits extraction and the pipeline"""
+    config = {
+        'url': f"{test_server}/csv",
+        'date_format': '%Y-%m-%d',
+        'selectors': {'company_name': 'company_name', 'position': 'position', 'date': 'date'}
+    }
+
+    async with aiohttp.ClientSession() as session:
+        parser = ParserFactory(session, tracker=Tracker(), user_agent_provider=UserAgentStub()).create_download_parser()
+
+        await parser.parse(config)
+
+        with patch.object(DownloadParser, '_extract_data') as extract:
+            assert await parser.parse(config) is None
+            extract.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_entries_on_same_url_keep_own_validators(test_server):
+    """test that validators of one site entry never make another entry on the same url skip its fetch"""
+    validators = ValidatorCache()
+    async with aiohttp.ClientSession() as session:
+        fetcher = DownloadFetcher(session, UserAgentStub(), validators)
+
+        assert await fetcher.fetch(f"{test_server}/csv", name="jobs") == CSV
+        assert await fetcher.fetch(f"{test_server}/csv", name="jobs-remote") == CSV
+        assert await fetcher.fetch(f"{test_server}/csv", name="jobs") is NOT_MODIFIED
+        assert validators.get(f"{test_server}/csv") is None
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from net.downloads import wait_for_download, wait_for_remote_download
+
+
+async def finish_download(directory, delay=0.2):
+    """Write the file like chrome: .crdownload first, renamed once complete"""
+    partial = os.path.join(directory, "export.csv.crdownload")
+    with open(partial, 'w') as file:
+        file.write("company_name,position\n")
+    await asyncio.sleep(delay)
+    with open(partial, 'a') as file:
+        file.write("Acme,Engineer\n")
+    os.rename(partial, os.path.join(directory, "export.csv"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_inotify", [True, False])
+async def test_returns_when_download_finishes(tmp_path, use_inotify):
+    """test that the file is handed off right after chrome renames it"""
+    start = time.monotonic()
+    writer = asyncio.create_task(finish_download(str(tmp_path)))
+
+    path = await wait_for_download(str(tmp_path), timeout=5, stable_for=0.1, use_inotify=use_inotify)
+    await writer
+
+    assert path == os.path.join(str(tmp_path), "export.csv")
+    assert time.monotonic() - start < 1.5
+
+
+@pytest.mark.asyncio
+async def test_ignores_download_in_progress(tmp_path):
+    """test that a .crdownload alone never counts as finished"""
+    (tmp_path / "export.csv.crdownload").write_text("company_name\n")
+    (tmp_path / "old.csv").write_text("company_name\n")
+
+    assert await wait_for_download(str(tmp_path), timeout=0.5) is None
+
+
+class GridDriverDouble:
+    """Managed downloads of a grid node: the file shows up as .crdownload first"""
+
+    def __init__(self):
+        self.listings = [[], ["export.csv.crdownload"], ["export.csv"]]
+
+    def get_downloadable_files(self):
+        return self.listings.pop(0) if len(self.listings) > 1 else self.listings[0]
+
+    def download_file(self, name, directory):
+        with open(os.path.join(directory, name), 'w') as file:
+            file.write("company_name,position\nAcme,Engineer\n")
+
+
+@pytest.mark.asyncio
+async def test_remote_download_copied_when_finished(tmp_path):
+    """test that a grid download is copied over once the node has finished it"""
+    async def run(fn, *args):
+        return fn(*args)
+
+    path = await wait_for_remote_download(GridDriverDouble(), str(tmp_path), run, timeout=5, poll_interval=0.01)
+
+    assert path == os.path.join(str(tmp_path), "export.csv")
+    assert open(path).read() == "company_name,position\nAcme,Engineer\n"
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+from net.host_scheduler import HostScheduler
+
+
+@pytest.mark.asyncio
+async def test_same_host_spaced():
+    """test that requests to one host are spaced by the minimum interval"""
+    scheduler = HostScheduler()
+    start = time.monotonic()
+
+    await asyncio.gather(*[scheduler.wait("http://board.example/jobs?page=" + str(i), 0.2) for i in range(3)])
+
+    assert time.monotonic() - start >= 0.4
+
+
+@pytest.mark.asyncio
+async def test_different_hosts_concurrent():
+    """test that different hosts do not wait on each other"""
+    scheduler = HostScheduler()
+    start = time.monotonic()
+
+    await asyncio.gather(*[scheduler.wait(f"http://board{i}.example/jobs", 0.5) for i in range(5)])
+
+    assert time.monotonic() - start < 0.2
+
+
+@pytest.mark.asyncio
+async def test_no_wait_after_interval_elapsed():
+    """test that no wait is added once the host has been idle long enough"""
+    scheduler = HostScheduler()
+    await scheduler.wait("http://board.example/jobs", 0.1)
+    await asyncio.sleep(0.15)
+
+    start = time.monotonic()
+    await scheduler.wait("http://board.example/jobs", 0.1)
+    assert time.monotonic() - start < 0.05
+
+
+def test_circuit_opens_after_failures():
+    """test that a host is skipped once it failed failure_threshold times in a row"""
+    scheduler = HostScheduler(failure_threshold=2, base_backoff=60)
+    url = "http://board.example/jobs"
+
+    scheduler.record_failure(url)
+    assert scheduler.allow(url)
+
+    scheduler.record_failure(url)
+    assert not scheduler.allow(url)
+    assert not scheduler.allow("http://board.example/other")  # same host
+    assert scheduler.allow("http://other.example/jobs")
+
+
+def test_half_open_probe():
+    """test that a single probe is let through after the backoff and decides the state"""
+    scheduler = HostScheduler(failure_threshold=1, base_backoff=0.05)
+    url = "http://board.example/jobs"
+
+    scheduler.record_failure(url)
+    assert not scheduler.allow(url)
+
+    time.sleep(0.06)
+    assert scheduler.allow(url)  # probe
+    assert not scheduler.allow(url)  # only one at a time
+
+    scheduler.record_success(url)
+    assert scheduler.allow(url)
+    assert scheduler.allow(url)
+
+
+def test_backoff_doubles():
+    """test that a failed probe re-opens the circuit for twice as long"""
+    scheduler = HostScheduler(failure_threshold=1, base_backoff=10, max_backoff=25)
+    url = "http://board.example/jobs"
+
+    scheduler.record_failure(url)
+    state = scheduler.state(url)
+    first = state.open_until - time.monotonic()
+
+    state.open_until = 0  # backoff over
+    assert scheduler.allow(url)
+    scheduler.record_failure(url)
+    second = state.open_until - time.monotonic()
+
+    state.open_until = 0
+    assert scheduler.allow(url)
+    scheduler.record_failure(url)
+    third = state.open_until - time.monotonic()
+
+    assert 9 < first <= 10
+    assert 19 < second <= 20
+    assert 24 < third <= 25  # capped at max_backoff
+
+
+def test_retry_in_while_open():
+    """test that retry_in reports the time left on an open circuit and 0 once closed"""
+    url = "http://board.example/jobs"
+    scheduler = HostScheduler(failure_threshold=1, base_backoff=60)
+    assert scheduler.retry_in(url) == 0
+
+    scheduler.record_failure(url)
+    assert 59 < scheduler.retry_in(url) <= 60
+
+    scheduler.record_success(url)
+    assert scheduler.retry_in(url) == 0
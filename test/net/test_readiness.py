@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from net.readiness import Readiness, render_mode, wait_until_ready
+from WebsiteManager import verify
+
+
+class ScriptDriver:
+    """Answers the readiness script with a fixed sequence"""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def execute_script(self, script, *args):
+        self.calls += 1
+        answer = self.answers.pop(0) if self.answers else False
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def test_defaults_to_first_selector():
+    """test that a site without a wait block waits on its first selector"""
+    config = {
+        'selectors': {'company_name': 'div.company', 'position': 'div.position'},
+        'ignore': {'position': ['Graduate']}
+    }
+    assert Readiness.from_config(config) == Readiness(selector='div.company')
+
+
+def test_wait_block():
+    """test that the wait block overrides the defaults"""
+    config = {
+        'selectors': {'company_name': 'div.company'},
+        'wait': {'selector': 'li.job', 'min_count': 10, 'network_idle': 500, 'dom_stable': 0, 'timeout': 5}
+    }
+    assert Readiness.from_config(config) == Readiness('li.job', 10, 500, 0, 5.0)
+
+
+def test_render_mode_validated():
+    """test that only the known render modes are accepted, by verify() too"""
+    assert render_mode({}) == 'live'
+    assert render_mode({'render': 'snapshot'}) == 'snapshot'
+    with pytest.raises(ValueError):
+        render_mode({'render': 'snapshop'})
+
+    site = {'url': "http://board.example/jobs", 'base_url': "http://board.example", 'date_format': '%Y-%m-%d',
+            'parser_type': 'JS', 'selectors': {'company_name': "div.company"}}
+    verify({'board': {**site, 'render': 'snapshot'}})
+    with pytest.raises(SystemExit):
+        verify({'board': {**site, 'render': 'snapshop'}})
+
+
+def test_returns_once_ready():
+    """test that polling stops as soon as the page reports ready"""
+    driver = ScriptDriver([False, RuntimeError("navigating"), True])
+    assert wait_until_ready(driver, Readiness(timeout=5))
+    assert driver.calls == 3
+
+
+def test_times_out():
+    """test that a page that never gets ready gives up after the timeout"""
+    start = time.monotonic()
+    assert not wait_until_ready(ScriptDriver([]), Readiness(timeout=0.3))
+    assert time.monotonic() - start < 1
@@ -0,0 +1,23 @@
+import pytest
+
+from net.resource_policy import blocked_urls, PROFILES
+
+
+def test_default_profile():
+    """test that sites without a resources entry get the safe default"""
+    patterns = blocked_urls({})
+    assert patterns == PROFILES['default']
+    assert '*.png' in patterns and '*google-analytics.com*' in patterns
+    assert '*.css' not in patterns
+
+
+def test_profile_with_extra_patterns():
+    """test that a resources block picks a profile and adds patterns"""
+    config = {'resources': {'profile': 'none', 'block': ["*://cdn.example.com/widgets/*"]}}
+    assert blocked_urls(config) == ["*://cdn.example.com/widgets/*"]
+
+
+def test_unknown_profile():
+    """test that a typo in the profile is reported"""
+    with pytest.raises(ValueError):
+        blocked_urls({'resources': 'lite'})
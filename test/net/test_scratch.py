@@ -0,0 +1,115 @@
+import errno
+import os
+import subprocess
+import sys
+import pytest
+
+from net.reaper import BrowserReaper, Process, find_orphans
+from net.scratch import ScratchSpace, process_start
+
+
+def fill(path, size):
+    with open(os.path.join(path, 'data'), 'wb') as file:
+        file.write(b'x' * size)
+
+
+def test_quota(tmp_path):
+    """test that no directory is created once the quota is used up"""
+    scratch = ScratchSpace(str(tmp_path), quota_mb=1)
+    fill(scratch.create('browser_'), 2 ** 20)
+
+    with pytest.raises(OSError) as error:
+        scratch.create('browser_')
+    assert error.value.errno == errno.EDQUOT
+
+
+def test_remove_reports_freed_bytes(tmp_path):
+    """test that removing a directory deletes it and reports its size"""
+    scratch = ScratchSpace(str(tmp_path))
+    path = scratch.create('downloads_')
+    fill(path, 1000)
+
+    assert scratch.remove(path) == 1000
+    assert not os.path.exists(path)
+    assert path not in scratch.owned
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="needs /proc")
+def test_only_roots_of_dead_processes_are_purged(tmp_path):
+    """test that another live worker's scratch root is kept and a dead one's is purged"""
+    worker = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    try:
+        live = tmp_path / f"{worker.pid}-{process_start(worker.pid)}"
+        dead = tmp_path / f"{worker.pid}-1"  # same pid, different start: reused
+        for root in (live, dead, tmp_path / 'unrelated'):
+            os.makedirs(root / 'browser_x')
+            fill(str(root / 'browser_x'), 10)
+
+        scratch = ScratchSpace(str(tmp_path))
+        assert scratch.dead_roots() == [str(dead)]
+        assert scratch.purge_stale() == 10
+        assert sorted(os.listdir(tmp_path)) == sorted([live.name, 'unrelated', os.path.basename(scratch.root)])
+    finally:
+        worker.kill()
+        worker.wait()
+
+
+def test_find_orphans():
+    """test that only our untracked browsers / drivers and dead workers' browsers are orphans"""
+    def process(pid, ppid, name, *args, age=600.0):
+        return Process(pid, ppid, name, [name, *args], 1000, age)
+
+    own = 100
+    table = {p.pid: p for p in [
+        process(own, 1, 'python'),
+        # tracked browser
+        process(200, own, 'chromedriver'),
+        process(201, 200, 'chrome', '--user-data-dir=/scratch/100-5/browser_a'),
+        # lost driver, its chrome goes with it
+        process(300, own, 'chromedriver'),
+        process(301, 300, 'chrome', '--user-data-dir=/scratch/100-5/browser_b'),
+        # chrome left after its driver died, with a renderer
+        process(401, 1, 'chrome', '--user-data-dir=/scratch/100-5/browser_c'),
+        process(402, 401, 'chrome', '--type=renderer', '--user-data-dir=/scratch/100-5/browser_c'),
+        # still launching
+        process(500, own, 'chromedriver', age=5),
+        # a live worker's browser
+        process(600, 1, 'python'),
+        process(601, 600, 'chromedriver'),
+        process(602, 601, 'chrome', '--user-data-dir=/scratch/600-7/browser_d'),
+        # a dead worker's browser, driver re-parented to init
+        process(701, 1, 'chromedriver'),
+        process(702, 701, 'chrome', '--user-data-dir=/scratch/700-9/browser_e'),
+        # unrelated chromedriver re-parented to init, and someone else's chrome
+        process(801, 1, 'chromedriver'),
+        process(901, 1, 'chrome', '--user-data-dir=/home/user/.config/chrome'),
+    ]}
+
+    orphans = find_orphans(table, '/scratch/100-5', {'/scratch/100-5/browser_a'}, ['/scratch/700-9'], {200}, own,
+                           grace=60)
+    assert sorted(orphans) == [300, 401, 701]
+
+
+class ScratchOnly:
+    def __init__(self, scratch):
+        self.scratch = scratch
+
+    def driver_pids(self):
+        return set()
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="needs /proc")
+def test_reaper_kills_orphaned_browser(tmp_path):
+    """test that the reaper kills a process using a profile nobody owns"""
+    scratch = ScratchSpace(str(tmp_path))
+    profile = os.path.join(scratch.root, 'browser_lost')
+    os.makedirs(profile)
+    browser = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)', f'--user-data-dir={profile}'])
+
+    try:
+        report = BrowserReaper(ScratchOnly(scratch), grace=0).reap()
+        assert report.processes == 1
+        browser.wait(timeout=5)  # already collected by the reaper, it is our child
+    finally:
+        if browser.poll() is None:
+            browser.kill()
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import aiohttp
+import pytest
+
+from net.conditional import ValidatorCache
+from net.single_flight import SingleFlight
+from processing.fetchers import DownloadFetcher
+
+CSV = "company_name,position,domain,description,date\nAcme,Engineer,acme.com,desc,2000-01-01\n"
+ETAG = '"v1"'
+
+
+class UserAgentStub:
+    random = "TestBot/1.0"
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        CountingHandler.requests += 1
+        time.sleep(0.1)  # keep the request in flight while the other entries ask for it
+        self.send_response(200)
+        self.send_header('Content-type', 'text/csv')
+        self.send_header('ETag', ETAG)
+        self.end_headers()
+        self.wfile.write(CSV.encode('utf-8'))
+
+
+@pytest.fixture
+def test_server():
+    CountingHandler.requests = 0
+    server = HTTPServer(('localhost', 0), CountingHandler)  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=2)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_flight():
+    """test that calls with the same key run once and later calls within the ttl reuse the result"""
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "content"
+
+    flight = SingleFlight(ttl=60)
+    results = await asyncio.gather(*[flight.do("key", work) for _ in range(5)])
+    assert results == ["content"] * 5
+
+    assert await flight.do("key", work) == "content"
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached():
+    """test that a None result is shared while in flight but not reused afterwards"""
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        return None
+
+    flight = SingleFlight(ttl=60)
+    assert await flight.do("key", work) is None
+    assert await flight.do("key", work) is None
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_on_same_url_share_fetch(test_server):
+    """test that entries on one url share a download but keep their own validators"""
+    validators = ValidatorCache()
+    async with aiohttp.ClientSession() as session:
+        fetcher = DownloadFetcher(session, UserAgentStub(), validators, single_flight=SingleFlight())
+
+        results = await asyncio.gather(*[
+            fetcher.fetch(f"{test_server}/csv", name=name) for name in ('board-design', 'board-engineering')
+        ])
+
+    assert results == [CSV, CSV]
+    assert CountingHandler.requests == 1
+    assert validators.headers('board-design') == {"If-None-Match": ETAG}
+    assert validators.headers('board-engineering') == {"If-None-Match": ETAG}
@@ -0,0 +1,87 @@
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import aiohttp
+import pytest
+
+from net.host_scheduler import HostScheduler, parse_retry_after
+from processing.fetchers import DownloadFetcher
+
+CSV = "company_name,position,domain,description,date\nAcme,Engineer,acme.com,desc,2000-01-01\n"
+
+
+class UserAgentStub:
+    random = "TestBot/1.0"
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    throttled = 0        # 429 responses to send before answering
+    retry_after = '0'
+    requests = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        ThrottlingHandler.requests += 1
+        if ThrottlingHandler.throttled > 0:
+            ThrottlingHandler.throttled -= 1
+            self.send_response(429)
+            self.send_header('Retry-After', ThrottlingHandler.retry_after)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/csv')
+        self.end_headers()
+        self.wfile.write(CSV.encode('utf-8'))
+
+
+@pytest.fixture
+def test_server():
+    ThrottlingHandler.requests = 0
+    server = HTTPServer(('localhost', 0), ThrottlingHandler)  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=2)
+
+
+def test_parse_retry_after():
+    """test that both Retry-After forms are understood"""
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 01 Jan 2000 00:00:00 GMT") == 0.0  # in the past
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+@pytest.mark.asyncio
+async def test_retries_after_short_pause(test_server):
+    """test that a 429 with a short Retry-After is retried and slows the host down"""
+    ThrottlingHandler.throttled, ThrottlingHandler.retry_after = 1, '0'
+    scheduler = HostScheduler()
+
+    async with aiohttp.ClientSession() as session:
+        fetcher = DownloadFetcher(session, UserAgentStub(), host_scheduler=scheduler)
+        assert await fetcher.fetch(f"{test_server}/csv") == CSV
+
+    assert ThrottlingHandler.requests == 2
+    assert scheduler.state(test_server).penalty == 0.5  # doubled to 1s, halved by the success
+
+
+@pytest.mark.asyncio
+async def test_long_pause_skips_host(test_server):
+    """test that a long Retry-After is not waited out and is shared by every entry on the host"""
+    ThrottlingHandler.throttled, ThrottlingHandler.retry_after = 1, '3600'
+    scheduler = HostScheduler()
+
+    async with aiohttp.ClientSession() as session:
+        fetcher = DownloadFetcher(session, UserAgentStub(), host_scheduler=scheduler)
+        other = DownloadFetcher(session, UserAgentStub(), host_scheduler=scheduler)
+
+        assert await fetcher.fetch(f"{test_server}/csv") is None
+        assert await other.fetch(f"{test_server}/other.csv") is None
+
+    assert ThrottlingHandler.requests == 1
@@ -0,0 +1,70 @@
+import json
+from unittest.mock import patch
+
+from net.user_agents import UserAgentPool, user_agent_for, USER_AGENTS_FILE
+from parsers.factory import ParserFactory
+
+AGENTS = ["Agent/1", "Agent/2", "Agent/3"]
+
+
+def test_same_agent_per_host():
+    """test that a host keeps the agent it was first given"""
+    pool = UserAgentPool(AGENTS)
+    agent = pool.for_host("http://board.example/robots.txt")
+
+    for _ in range(20):
+        assert pool.for_host("http://board.example/jobs?page=2") == agent
+
+
+def test_rotate_changes_agent():
+    """test that rotating picks a different agent for the host"""
+    pool = UserAgentPool(AGENTS)
+    agent = pool.for_host("http://board.example/jobs")
+
+    rotated = pool.rotate("http://board.example/jobs")
+    assert rotated != agent
+    assert pool.for_host("http://board.example/jobs") == rotated
+
+
+def test_rotate_after():
+    """test that an agent older than rotate_after is replaced"""
+    pool = UserAgentPool(AGENTS, rotate_after=0)
+    agent = pool.for_host("http://board.example/jobs")
+
+    assert pool.for_host("http://board.example/jobs") != agent
+
+
+def test_providers_without_hosts():
+    """test that plain providers (only .random) still work"""
+    class UserAgentStub:
+        random = "TestBot/1.0"
+
+    assert user_agent_for(UserAgentStub(), "http://board.example/jobs") == "TestBot/1.0"
+
+
+def test_committed_pool_loads():
+    """test that the committed pool file is usable"""
+    pool = UserAgentPool.load()
+
+    assert len(pool.agents) == len(json.loads(USER_AGENTS_FILE.read_text(encoding='utf-8')))
+    assert pool.for_host("http://board.example/jobs") in pool.agents
+
+
+def test_download_only_factory_does_not_load_pool():
+    """test that building a DOWNLOAD parser leaves the user agent pool unloaded until the first request"""
+    with patch.object(UserAgentPool, 'load', wraps=UserAgentPool.load) as load:
+        factory = ParserFactory(session=None)
+        parser = factory.create_download_parser()
+        load.assert_not_called()
+
+        assert user_agent_for(parser.fetcher.ua_provider, "http://board.example/jobs") in factory.ua_provider.agents
+        load.assert_called_once()
+
+
+def test_factory_pool_rotation_from_env(monkeypatch):
+    """test that USER_AGENT_ROTATE_AFTER sets the factory pool's rotation, unset keeps agents sticky"""
+    monkeypatch.setenv('USER_AGENT_ROTATE_AFTER', '3600')
+    assert ParserFactory(session=None).ua_provider.rotate_after == 3600
+
+    monkeypatch.delenv('USER_AGENT_ROTATE_AFTER')
+    assert ParserFactory(session=None).ua_provider.rotate_after is None
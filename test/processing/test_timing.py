@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from processing.timing import StageTimings, format_report, measure, record_rows, timed
+
+
+class Clock:
+    """perf_counter that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_clock():
+    clock = Clock()
+    return clock, patch('processing.timing.time.perf_counter', clock)
+
+
+def test_nested_stage_excluded_from_outer():
+    """test that time spent in a nested stage is only counted for that stage (robots is not fetch time)"""
+    clock, perf_counter = fake_clock()
+    with perf_counter, measure() as timings:
+        with timed('fetch'):
+            clock.now += 1
+            with timed('robots'):
+                clock.now += 2
+            clock.now += 3
+        with timed('extract'):
+            clock.now += 4
+
+    assert timings.stages == {'robots': 2, 'fetch': 4, 'extract': 4}
+    assert timings.total == 10
+
+
+def test_repeated_stage_adds_up():
+    """test that a stage entered twice (e.g. one extract per streamed chunk) is summed"""
+    clock, perf_counter = fake_clock()
+    with perf_counter, measure() as timings:
+        for _ in range(3):
+            with timed('extract'):
+                clock.now += 0.5
+
+    assert timings.stages == {'extract': 1.5}
+
+
+def test_nothing_recorded_without_measure():
+    """test that timed and record_rows do nothing outside of measure"""
+    with timed('fetch'):
+        record_rows('extracted', 5)
+
+    with measure() as timings:
+        pass
+    assert timings.stages == {} and timings.rows == {}
+
+
+def test_record_rows():
+    """test that row counts are summed per name"""
+    with measure() as timings:
+        record_rows('extracted', 5)
+        record_rows('extracted', 3)
+        record_rows('published', 2)
+
+    assert timings.rows == {'extracted': 8, 'published': 2}
+
+
+def test_format_report():
+    """test that the report has a line per site, its error, and the sum of every site"""
+    board = StageTimings()
+    board.add('fetch', 1.5)
+    board.add('extract', 0.25)
+    board.total = 2.0
+    board.rows = {'extracted': 12, 'published': 4}
+
+    broken = StageTimings()
+    broken.add('fetch', 0.5)
+    broken.total = 0.5
+    broken.error = "timed out"
+
+    lines = format_report({'board': board, 'broken': broken}).splitlines()
+
+    assert lines[0].split() == ['site', 'robots', 'fetch', 'extract', 'pipeline', 'publish', 'total', 'rows',
+                                'published']
+    assert lines[2].split() == ['board', '0.00s', '1.50s', '0.25s', '0.00s', '0.00s', '2.00s', '12', '4']
+    assert lines[3].endswith("error: timed out")
+    assert lines[-1].split() == ['sum', '0.00s', '2.00s', '0.25s', '0.00s', '0.00s', '2.50s']
@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+import pytest
+
+from net.host_scheduler import HostScheduler
+from WebsiteManager import Manager, TIMEOUT_3HOURS
+
+config = {'name': 'jobs', 'url': "http://jobs.example.com/careers", 'selectors': {'company_name': "div.company"}}
+
+
+class FactoryStub:
+    def __init__(self):
+        self.host_scheduler = HostScheduler()
+
+
+class FailingParser:
+    """Parse fails like a fetcher does: the failure is recorded for the host"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.calls = 0
+
+    async def parse(self, config):
+        self.calls += 1
+        self.scheduler.record_failure(config['url'])
+        return None
+
+
+def fake_sleeps(manager, iterations):
+    """Record the manager's sleeps instead of sleeping, stop it after a number of them"""
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        if len(slept) >= iterations:
+            manager.running = False
+
+    return slept, patch('WebsiteManager.asyncio.sleep', fake_sleep)
+
+
+@pytest.fixture
+def manager():
+    manager = Manager('websites.yaml')
+    manager._factory = FactoryStub()
+    manager.running = True
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_open_host_skipped_by_manager(manager):
+    """test that the manager loop does not attempt a site while its host's circuit is open"""
+    scheduler = manager._factory.host_scheduler
+    for _ in range(2):
+        scheduler.record_failure(config['url'])
+
+    parser = FailingParser(scheduler)
+    slept, sleep = fake_sleeps(manager, 1)
+    with sleep:
+        await manager._process(parser, config, TIMEOUT_3HOURS)
+
+    assert parser.calls == 0
+    assert 29 * 60 < slept[0] <= 30 * 60
+
+
+@pytest.mark.asyncio
+async def test_next_attempt_when_circuit_allows_probe(manager):
+    """test that after the circuit opens the site is retried at the probe time, not after its full interval"""
+    parser = FailingParser(manager._factory.host_scheduler)
+    slept, sleep = fake_sleeps(manager, 2)
+    with sleep:
+        await manager._process(parser, config, TIMEOUT_3HOURS)
+
+    # first failure: the usual interval, second failure opens the circuit: 30 min
+    assert parser.calls == 2
+    assert slept[0] > 2 * 60 * 60
+    assert 29 * 60 < slept[1] <= 30 * 60
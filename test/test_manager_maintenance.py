@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from Database.notion import NotionDatabase
+from WebsiteManager import Manager
+
+
+@pytest.mark.asyncio
+async def test_cleaner_runs_before_anything_is_published():
+    """test that every replica starts the cleaner with the election, not on its first publish"""
+    manager = Manager('websites.yaml')
+    database = NotionDatabase()
+    assert database.database_cleaner is None
+
+    try:
+        await manager._start_maintenance()
+
+        assert database.leader is manager.leader
+        assert database.database_cleaner is not None and not database.database_cleaner.done()
+    finally:
+        await manager.leader.stop()
+        if database.database_cleaner is not None:
+            database.database_cleaner.cancel()
+            await asyncio.gather(database.database_cleaner, return_exceptions=True)
+        database._database_cleaner = None
+        database.leader = None
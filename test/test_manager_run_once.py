@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+import yaml
+
+from processing.timing import record_rows, timed
+from WebsiteManager import Manager
+
+site = {'url': "http://jobs.example.com/careers", 'base_url': "http://jobs.example.com", 'date_format': '%Y-%m-%d',
+        'parser_type': 'STATIC', 'selectors': {'company_name': "div.company"}}
+
+
+class ResultStub:
+    def __init__(self, companies):
+        self.company_name = companies
+
+
+class ParserStub:
+    """Parses like BaseParser does: stages are timed, failing sites raise"""
+
+    async def parse(self, config):
+        if config.get('fail'):
+            with timed('fetch'):
+                raise RuntimeError("board is down")
+
+        with timed('fetch'):
+            await asyncio.sleep(0.01)
+        record_rows('extracted', 3)
+        return ResultStub(["Acme", "Initech"])
+
+
+class BusStub:
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.published = []
+
+    async def publish(self, result):
+        self.published.append(result)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    websites_file = tmp_path / 'websites.yaml'
+    websites_file.write_text(yaml.safe_dump({'websites': {'board': site, 'broken': {**site, 'fail': True}}}))
+
+    manager = Manager(str(websites_file))
+    manager.parsers = {'STATIC': ParserStub()}
+    manager._create_parsers = lambda parser_types: manager.parsers
+    manager.bus = BusStub()
+
+    async def no_maintenance():
+        pass
+
+    manager._start_maintenance = no_maintenance  # no Notion
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_run_once_returns_timings_per_site(manager):
+    """test that run_once times every site and records published rows"""
+    results = await manager.run_once()
+
+    board = results['board']
+    assert board.error is None
+    assert board.stages['fetch'] > 0 and 'publish' in board.stages
+    assert board.rows == {'extracted': 3, 'published': 2}
+    assert board.total >= board.stages['fetch']
+    assert len(manager.bus.published) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_once_records_failing_site(manager):
+    """test that a failing site gets its error recorded and does not stop the others"""
+    results = await manager.run_once()
+
+    assert set(results) == {'board', 'broken'}
+    assert results['broken'].error == "board is down"
+    assert 'fetch' in results['broken'].stages
+    assert results['broken'].rows == {}
+    assert results['board'].error is None
+    assert manager.running is False
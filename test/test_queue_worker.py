@@ -0,0 +1,39 @@
+from unittest.mock import patch
+
+import pytest
+
+from WebsiteManager import Manager
+
+
+class QueueDouble:
+    def __init__(self, manager):
+        self.manager = manager
+        self.leased_while_clearing = []
+
+    async def lease(self, owner, lease_seconds):
+        self.leased_while_clearing.append(self.manager.clearing_flag)
+        return None
+
+
+@pytest.mark.asyncio
+async def test_no_lease_while_clearing():
+    """test that a worker waits for the database clearing before leasing, so its lease can't expire meanwhile"""
+    manager = Manager('websites.yaml')
+    manager.crawl_queue = queue = QueueDouble(manager)
+    manager.running = True
+    manager.clearing_flag = True
+
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        if len(slept) == 1:
+            manager.clearing_flag = False  # clearing done
+        else:
+            manager.running = False
+
+    with patch('WebsiteManager.asyncio.sleep', fake_sleep):
+        await manager._queue_worker()
+
+    assert slept[0] == 12 * 60
+    assert queue.leased_while_clearing == [False]